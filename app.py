@@ -8,226 +8,227 @@ Funzionalità:
 - Verifica le 34 colonne obbligatorie (tutte incluse nel JSON, senza rinomini)
 - Estrae stagione dal filename (YYYY_YYYY | YYYY-YYYY | YYYY/YYYY)
 - Scrive un file per stagione: "YYYY_YYYY.json" + aggiorna "seasons.json"
-- Log a schermo e in "conversion.log" (nella cartella di output)
+- Log a schermo e in "conversion.log" (nella cartella di output), scritto con
+  buffer e stampato a blocchi nella finestra; da riga di comando anche livelli
+  di log e "conversion.jsonl" (una riga JSON per messaggio)
 - Opzione "Modalità RAW" per saltare la normalizzazione
 - NUOVO: selezione di singoli file (anche multipli) OPPURE cartella input
+- Conversione parallela: un processo per file (numero processi configurabile, default = core)
+- Conversione in un thread separato: la finestra resta reattiva, con pulsante "Stop"
+- Modalità incrementale: salta i file Excel invariati dall'ultima conversione
+- Report a fine conversione: tempi per fase, righe, byte e memoria per file,
+  nel log e in "run_report.json"
+- Scritture atomiche (file temporaneo + fsync + rinomina): i JSON di stagione
+  nuovi sono pubblicati tutti insieme a fine conversione, subito prima di
+  seasons.json, quindi si può convertire direttamente nella cartella servita online
+- Pulsante "Verifica": controlla foglio, colonne e stagioni di tutti i file
+  leggendo solo l'intestazione, senza convertire nulla
+- Opzione "solo colonne obbligatorie": legge l'intestazione, scarta subito i file
+  incompleti e poi legge solo le 34 colonne (più eventuali extra indicati)
+- JSON scritti con orjson se installato (altrimenti json standard), anche in
+  formato compatto (minificato)
+- Formato opzionale schema_version 2: giocatori come righe posizionali
+  (file più piccoli), indicato per stagione in seasons.json
+- Copie precompresse opzionali (.json.gz e, con brotli installato, .json.br)
+  di ogni JSON, con dimensioni e hash in seasons.json
+- Nomi file opzionali con impronta del contenuto (YYYY_YYYY.<hash8>.json) per
+  cache immutabile, con pulizia delle versioni superate
+- Opzione "Tipi compatti": DataFrame normalizzati con interi piccoli, categorie
+  e float32 (circa metà memoria), stesso JSON
+- Motore Excel selezionabile: python-calamine (se installato, più veloce) con
+  ripiego automatico su openpyxl (.xlsx) / xlrd (.xls)
+- Motore di conversione selezionabile: pandas oppure "lite" in Python puro
+  (fcm_lite.py, senza pandas/NumPy: avvio più rapido, EXE più piccolo), stesso JSON
+- Opzione "Cache dei fogli letti": i fogli già letti dagli stessi Excel sono
+  ripresi da una cache su disco (con pulizia dei meno usati), così cambiare RAW
+  o formato del JSON non rilegge l'Excel
+- Avvio rapido: pandas e i motori Excel sono importati solo quando servono; a
+  finestra aperta un thread in background li precarica ("--no-prewarm" per
+  disattivare, "--import-times" per i tempi nel log). I processi paralleli sono
+  avviati alla prima conversione e riusati dalle successive ("--prewarm-pool" per
+  avviarli già all'apertura)
+
+Il motore di conversione è in fcm_core.py; per l'uso senza GUI (server, cron)
+vedi fcm_convert.py.
 
 Dipendenze:
 - pandas==2.2.2, openpyxl==3.1.5, xlrd==2.0.1, FreeSimpleGUI==5.2.0.post1
 """
 
+import os
 import re
-import json
+import time
+import argparse
+import threading
+import multiprocessing
+from collections import deque
 from pathlib import Path
-from datetime import datetime
 
-import pandas as pd
-import FreeSimpleGUI as sg
-
-
-# ====== Costanti e configurazione ======
-
-SHEET_NAME = "Tutti i dati"
-
-REQUIRED_COLUMNS = [
-    "Nome","Sq","R","COD","FMld","T","P","Aff%",
-    "MVC","MVF","MVT","MVDSt","MVDlt","MVAnd","MVRnd",
-    "FMC","FMF","FMT","FMDSt","FMDlt","FMAnd","FMRnd",
-    "GF","GFR","GS","GSR","AG","AS","RP","RS","A","E","TIn","ID"
-]
+# Inizio dell'avvio (prima di FreeSimpleGUI), per il tempo di apertura della finestra
+STARTUP_T0 = time.perf_counter()
 
-# Colonne tipizzate per normalizzazione (se RAW è disattivato)
-FLOAT_COLS = {
-    "FMld","Aff%","MVC","MVF","MVT","MVDSt","MVDlt","MVAnd","MVRnd",
-    "FMC","FMF","FMT","FMDSt","FMDlt","FMAnd","FMRnd"
-}
-INT_COLS = {"T","P","GF","GFR","GS","GSR","AG","AS","RP","RS","A","E","TIn"}
-STR_COLS = {"Nome","Sq","R","COD","ID"}  # ID trattato come stringa
+import FreeSimpleGUI as sg
 
+from fcm_core import (CORE_CHOICES, ENGINE_CHOICES, SHEET_NAME, collect_input_files, default_cache_dir,
+                      default_workers, format_import_times, pool_alive, prewarm_imports, process_files,
+                      validate_files, warm_process_pool)
 
-# ====== Utility ======
 
-def extract_season_from_filename(stem: str):
-    """
-    Estrae la stagione dal nome file con pattern:
-      - 2021_2022
-      - 2021-2022
-      - 2021/2022
-    Ritorna: (season_label '2021/2022', season_key '2021_2022')
-    """
-    m = re.search(r"(20\d{2})\s*[_/\-]\s*(20\d{2})", stem)
-    if not m:
-        raise ValueError("Impossibile estrarre la stagione dal nome file (atteso pattern YYYY_YYYY)")
-    y1, y2 = m.group(1), m.group(2)
-    return f"{y1}/{y2}", f"{y1}_{y2}"
+# Ogni quanto (ms) la finestra stampa le righe di log accumulate dal thread di lavoro
+LOG_REFRESH_MS = 150
 
 
-def read_excel_with_engine(fp: Path, sheet_name: str):
+def _process_files(files, output_dir: Path, window, log_queue, raw_mode=False, workers=None,
+                   cancel_event=None, incremental=False, engine="auto", only_required=False,
+                   extra_columns=(), compact=False, schema_version=1, precompress=False,
+                   fingerprint=False, compact_dtypes=False, core="auto", cache_dir=None, pool=None):
     """
-    Usa openpyxl per .xlsx e xlrd per .xls (strada rapida, senza Rust).
+    Adattatore GUI di process_files: avanzamento e stato dei singoli file
+    arrivano alla finestra tramite window.write_event_value ("-PROGRESS-",
+    "-FILESTATUS-"), quindi è sicuro chiamarla da un thread separato.
+    Le righe di log finiscono in log_queue (deque) e la finestra le stampa a
+    blocchi ogni LOG_REFRESH_MS, invece di un evento e un aggiornamento per riga.
     """
-    suffix = fp.suffix.lower()
-    if suffix == ".xlsx":
-        return pd.read_excel(fp, sheet_name=sheet_name, engine="openpyxl")
-    else:  # .xls (o altro legacy -> proviamo xlrd)
-        return pd.read_excel(fp, sheet_name=sheet_name, engine="xlrd")
+    return process_files(
+        files, output_dir, raw_mode=raw_mode, workers=workers, cancel_event=cancel_event,
+        incremental=incremental, engine=engine, only_required=only_required,
+        extra_columns=extra_columns, compact=compact, schema_version=schema_version,
+        precompress=precompress, fingerprint=fingerprint, compact_dtypes=compact_dtypes, core=core,
+        cache_dir=cache_dir, pool=pool, on_log=log_queue.append,
+        on_progress=lambda done, total: window.write_event_value("-PROGRESS-", (done, total)),
+        on_file_status=lambda name, status: window.write_event_value("-FILESTATUS-", (name, status)),
+    )
+
+
+def _run_conversion(files, output_dir: Path, window, log_queue, cancel_event, warm=None, **opts):
+    """Corpo del thread di conversione: segnala sempre la fine con "-DONE-"."""
+    try:
+        if warm is not None:
+            opts["pool"] = warm.take(opts["workers"], opts["core"], opts["engine"])
+        _process_files(files, output_dir, window, log_queue, cancel_event=cancel_event, **opts)
+    except Exception as e:
+        log_queue.append(f"[ERRORE] Conversione interrotta: {e}")
+    finally:
+        window.write_event_value("-DONE-", None)
 
 
-def normalize_df(df: pd.DataFrame):
+def _run_validation(files, window, log_queue, cancel_event, warm=None, workers=1, engine="auto"):
     """
-    Normalizza tipi:
-    - Trim stringhe note
-    - Float: converte virgola -> punto, rimuove %, caratteri non numerici; arrotonda a 2 decimali
-    - Interi: coerzione numerica, NaN -> 0
-    Mantiene tutte le colonne (anche eventuali extra).
+    Corpo del thread di verifica (dry run): nessun file viene scritto. Legge solo le
+    intestazioni, quindi non usa il pool della conversione (con pandas già importato).
     """
-    # Trim
-    for c in df.columns:
-        if c in STR_COLS:
-            df[c] = df[c].astype(str).str.strip()
-
-    # Float
-    for c in df.columns:
-        if c in FLOAT_COLS:
-            s = df[c].astype(str).str.strip()
-            s = (
-                s.str.replace("%", "", regex=False)
-                 .str.replace(",", ".", regex=False)
-                 .str.replace("–", "", regex=False)
-                 .str.replace("-", "", regex=False)
-            )
-            df[c] = pd.to_numeric(s, errors="coerce").round(2)
-
-    # Interi
-    for c in df.columns:
-        if c in INT_COLS:
-            s = pd.to_numeric(df[c], errors="coerce")
-            df[c] = s.fillna(0).astype(int)
-
-    return df
-
-
-def ensure_required_columns(df: pd.DataFrame):
-    """Ritorna la lista di colonne mancanti rispetto a REQUIRED_COLUMNS."""
-    return [c for c in REQUIRED_COLUMNS if c not in df.columns]
-
-
-def write_json(path: Path, data: dict):
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
-def append_logfile(logfile: Path, msg: str):
     try:
-        with logfile.open("a", encoding="utf-8") as f:
-            f.write(msg + "\n")
-    except Exception:
-        pass
-
-
-def _process_files(files, output_dir: Path, window, raw_mode=False):
+        if warm is not None:
+            warm.wait()
+        validate_files(
+            files, workers=workers, engine=engine, cancel_event=cancel_event,
+            on_log=log_queue.append,
+            on_progress=lambda done, total: window.write_event_value("-PROGRESS-", (done, total)),
+        )
+    except Exception as e:
+        log_queue.append(f"[ERRORE] Verifica interrotta: {e}")
+    finally:
+        window.write_event_value("-DONE-", None)
+
+
+class _WarmPool:
     """
-    Core: elabora la lista di file Excel passati.
+    Moduli e processi paralleli della conversione: pandas e motori Excel importati
+    in background nella GUI a finestra aperta (vedi prewarm_imports) e un pool i cui
+    processi li hanno importati a loro volta (vedi warm_process_pool), creato alla
+    prima conversione (o già in prepare con workers > 1) e riusato dalle successive
+    con gli stessi processi, motore di conversione e motore Excel. I thread di lavoro
+    chiamano wait() o take(), che attendono la fine della preparazione: così nessun
+    pool viene creato (fork su Linux) mentre il thread in background sta ancora
+    importando pandas.
     """
-    output_dir.mkdir(parents=True, exist_ok=True)
-    seasons = []
-    now_iso = datetime.utcnow().isoformat(timespec="seconds") + "Z"
-
-    # Filtra solo .xls/.xlsx esistenti
-    files = [Path(p) for p in files]
-    files = [p for p in files if p.is_file() and p.suffix.lower() in (".xls", ".xlsx")]
-    files = sorted(files, key=lambda p: p.name.lower())
-
-    logfile = output_dir / "conversion.log"
-
-    def log(*args):
-        line = " ".join(str(a) for a in args)
-        window["-LOG-"].print(line)
-        append_logfile(logfile, line)
-
-    if not files:
-        log("[INFO] Nessun file .xls/.xlsx valido selezionato.")
-        return
-
-    window["-PBAR-"].update(0, max=len(files))
-    seen_seasons = set()
 
-    for i, fp in enumerate(files, start=1):
-        window["-PBAR-"].update(i)
-        log(f"Leggo: {fp.name}")
-
-        # Estrazione stagione da filename
+    def __init__(self):
+        self.pool = None
+        self.key = None
+        self.thread = None
+
+    def prepare(self, window, workers=1, core="auto", engine="auto"):
+        """
+        Avvia la preparazione (il pool solo con workers > 1); la fine viene segnalata
+        con "-PREWARM-" (tempi o eccezione).
+        """
+        self.thread = threading.Thread(target=self._prepare, args=(window, (workers, core, engine)),
+                                       daemon=True)
+        self.thread.start()
+
+    def _prepare(self, window, key):
         try:
-            season_label, season_key = extract_season_from_filename(fp.stem)
+            result = prewarm_imports(key[1], key[2])
+            t0 = time.perf_counter()
+            self.pool, self.key = warm_process_pool(*key), key
+            if self.pool is not None:
+                result[f"{key[0]} processi"] = time.perf_counter() - t0
         except Exception as e:
-            log(f"  [WARN] {e} -> file saltato")
-            continue
-
-        if season_key in seen_seasons:
-            log(f"  [WARN] Stagione duplicata '{season_key}' (verrà sovrascritta con questo file).")
-        seen_seasons.add(season_key)
-
-        # Lettura Excel
+            result = e
         try:
-            df = read_excel_with_engine(fp, SHEET_NAME)
-        except Exception as e:
-            log(f"  [ERRORE] Impossibile leggere il foglio '{SHEET_NAME}': {e}")
-            continue
-
-        # Validazione colonne
-        missing = ensure_required_columns(df)
-        if missing:
-            log(f"  [ERRORE] Colonne mancanti: {missing} -> file saltato")
-            continue
-
-        # Normalizzazione (se RAW disattivato)
-        if not raw_mode:
-            df = normalize_df(df)
+            window.write_event_value("-PREWARM-", result)
+        except Exception:
+            pass  # finestra già chiusa
+
+    def wait(self):
+        """Attende la fine della preparazione in background (se avviata)."""
+        if self.thread is not None:
+            self.thread.join()
+
+    def take(self, workers, core="auto", engine="auto"):
+        """Pool per una conversione con questi parametri (None con un solo processo)."""
+        self.wait()
+        key = (workers, core, engine)
+        if self.pool is not None and (self.key != key or not pool_alive(self.pool)):
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        if self.pool is None and workers > 1:
+            self.pool, self.key = warm_process_pool(workers, core, engine), key
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+def _selected_files(vals):
+    """
+    File scelti nella finestra: i file selezionati in alto hanno priorità sulla cartella input.
+    Ritorna None (dopo aver mostrato l'errore) se non c'è una selezione valida.
+    """
+    files_str = (vals.get("-FILES-") or "").strip()
+    if files_str:
+        # Split robusto: ';' (Windows), virgola, newline
+        parts = re.split(r"[;\n,]+", files_str)
+        return [Path(p.strip().strip('"')) for p in parts if p.strip()]
 
-        # Mantieni tutte le colonne presenti (ordine del DataFrame)
-        cols = list(df.columns)
-
-        out = {
-            "schema_version": 1,
-            "season_label": season_label,  # es. "2021/2022"
-            "season_key": season_key,      # es. "2021_2022" (safe per filename/URL)
-            "generated_at": now_iso,
-            "columns": cols,
-            "players": df.to_dict(orient="records"),
-        }
-
-        out_path = output_dir / f"{season_key}.json"
-        try:
-            write_json(out_path, out)
-        except Exception as e:
-            log(f"  [ERRORE] Scrittura JSON {out_path.name}: {e}")
-            continue
-
-        seasons.append({
-            "label": season_label,
-            "key": season_key,
-            "file": out_path.name,
-            "n_players": int(len(df)),
-            "last_updated": now_iso
-        })
-        log(f"  [OK] Generato {out_path.name} ({len(df)} righe)")
-
-    # Aggiorna manifest
-    if seasons:
-        dedup = {s["key"]: s for s in seasons}
-        seasons_sorted = [dedup[k] for k in sorted(dedup.keys())]
-        manifest = {"schema_version": 1, "seasons": seasons_sorted}
-        try:
-            write_json(output_dir / "seasons.json", manifest)
-            log(f"[OK] Aggiornato seasons.json ({len(seasons_sorted)} stagioni)")
-        except Exception as e:
-            log(f"[ERRORE] Scrittura seasons.json: {e}")
-    else:
-        log("[FINE] Nessun JSON generato (nessun file valido).")
+    in_dir = Path(vals["-IN-"]) if vals.get("-IN-") else None
+    if not in_dir or not in_dir.exists():
+        sg.popup_error("Seleziona una cartella input valida oppure scegli uno o più file in alto")
+        return None
+    # Leggi tutti i .xls/.xlsx nella cartella
+    return collect_input_files([in_dir])
 
 
 # ====== GUI ======
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="FCM_Excel_2_JSON", description="FCM – Excel → JSON (GUI)")
+    parser.add_argument("--import-times", action="store_true",
+                        help="scrive nel log il tempo di apertura della finestra e di importazione dei moduli")
+    parser.add_argument("--no-prewarm", action="store_true",
+                        help="non precarica pandas e i motori Excel in background all'avvio")
+    parser.add_argument("--prewarm-pool", action="store_true",
+                        help="avvia già all'apertura i processi paralleli della conversione "
+                             "(altrimenti alla prima conversione)")
+    # parse_known_args: l'EXE PyInstaller può ricevere argomenti propri (es. multiprocessing)
+    return parser.parse_known_args(argv)[0]
+
+
+def main(argv=None):
+    args = parse_args(argv)
     # Tema (compat)
     try:
         if hasattr(sg, "theme"):
@@ -249,62 +250,196 @@ def main():
         [sg.Text("Cartella output (JSON)"),
          sg.Input(key="-OUT-"),
          sg.FolderBrowse()],
-        [sg.Checkbox("Modalità RAW (non convertire numeri/percentuali)", default=False, key="-RAW-")],
+        [sg.Checkbox("Modalità RAW (non convertire numeri/percentuali)", default=False, key="-RAW-"),
+         sg.Checkbox("Tipi compatti in memoria (meno RAM)", default=False, key="-DTYPES-"),
+         sg.Checkbox("Cache dei fogli letti", default=False, key="-CACHE-",
+                     tooltip=f"Riusa i fogli già letti dagli stessi Excel (in {default_cache_dir()})")],
+        [sg.Checkbox("Solo file modificati (incrementale)", default=False, key="-INCR-"),
+         sg.Checkbox("JSON compatto (minificato)", default=False, key="-COMPACT-"),
+         sg.Checkbox("Righe posizionali (schema_version 2)", default=False, key="-SCHEMA2-")],
+        [sg.Checkbox("Copie precompresse .gz/.br per il server web", default=False, key="-PRECOMP-"),
+         sg.Checkbox("Nomi file con impronta (cache immutabile)", default=False, key="-FINGERPRINT-")],
+        [sg.Checkbox("Solo le 34 colonne obbligatorie, più:", default=False, key="-ONLYREQ-"),
+         sg.Input(key="-EXTRA-", size=(40, 1), tooltip="Colonne extra da mantenere, separate da virgola")],
+        [sg.Text("Processi paralleli"),
+         sg.Spin(values=list(range(1, max(default_workers(), 32) + 1)),
+                 initial_value=default_workers(), key="-WORKERS-", size=(4, 1))],
         [sg.Text("Foglio (fisso):"),
-         sg.Input(SHEET_NAME, key="-SHEET-", size=(30, 1), disabled=True)],
-        [sg.ProgressBar(max_value=100, orientation='h', size=(50, 20), key='-PBAR-')],
+         sg.Input(SHEET_NAME, key="-SHEET-", size=(30, 1), disabled=True),
+         sg.Text("Motore Excel"),
+         sg.Combo(list(ENGINE_CHOICES), default_value="auto", key="-ENGINE-", readonly=True, size=(10, 1)),
+         sg.Text("Conversione"),
+         sg.Combo(list(CORE_CHOICES), default_value="auto", key="-CORE-", readonly=True, size=(8, 1),
+                  tooltip="pandas oppure lite (Python puro, senza pandas): stesso JSON")],
+        [sg.ProgressBar(max_value=100, orientation='h', size=(50, 20), key='-PBAR-'),
+         sg.Text("", key="-STATUS-", size=(50, 1))],
         [sg.Button("Converti", key="-RUN-", button_color=("white", "#2563eb")),
+         sg.Button("Verifica", key="-CHECK-", tooltip="Controlla foglio, colonne e stagioni senza convertire"),
+         sg.Button("Stop", key="-STOP-", disabled=True),
          sg.Button("Apri output"),
          sg.Button("Chiudi")],
         [sg.Multiline(size=(110, 22), key="-LOG-", autoscroll=True, disabled=True, write_only=True)]
     ]
 
-    window = sg.Window("FCM_Excel_2_JSON (FreeSimpleGUI)", layout, finalize=True)
+    # La X della finestra genera WINDOW_CLOSE_ATTEMPTED_EVENT invece di distruggerla:
+    # con un lavoro in corso la finestra resta viva finché il thread non ha finito
+    window = sg.Window("FCM_Excel_2_JSON (FreeSimpleGUI)", layout, finalize=True,
+                       enable_close_attempted_event=True)
     window["-PBAR-"].update(0, max=100)
+    if args.import_times:
+        window["-LOG-"].print(f"[INFO] Finestra visibile in {time.perf_counter() - STARTUP_T0:.3f}s "
+                              "(pandas e motori Excel non ancora importati)")
+    warm = _WarmPool()
+    if not args.no_prewarm:
+        warm.prepare(window, default_workers() if args.prewarm_pool else 1)
+
+    worker = None        # thread di conversione/verifica in corso
+    cancel_event = None
+    closing = False      # chiusura richiesta con un lavoro in corso: si esce a "-DONE-"
+    pbar_max = 100
+    log_queue = deque()  # righe di log dal thread di lavoro, stampate a blocchi
+
+    def flush_log():
+        if log_queue:
+            lines = []
+            while log_queue:
+                lines.append(log_queue.popleft())
+            window["-LOG-"].print("\n".join(lines))
+
+    def start(target, *args, **kwargs):
+        nonlocal worker
+        window["-RUN-"].update(disabled=True)
+        window["-CHECK-"].update(disabled=True)
+        window["-STOP-"].update(disabled=cancel_event is None)
+        window["-STATUS-"].update("")
+        window["-LOG-"].update("")
+        worker = threading.Thread(target=target, args=args, kwargs=kwargs, daemon=True)
+        worker.start()
+
+    def read_workers(vals):
+        try:
+            return max(1, int(vals.get("-WORKERS-") or default_workers()))
+        except (TypeError, ValueError):
+            return default_workers()
 
     while True:
-        ev, vals = window.read()
-        if ev in (sg.WINDOW_CLOSED, "Chiudi"):
+        # Con un lavoro in corso la finestra si risveglia ogni LOG_REFRESH_MS per stampare il log
+        ev, vals = window.read(timeout=LOG_REFRESH_MS if worker is not None else None)
+        flush_log()
+        if ev == sg.WINDOW_CLOSED:
             break
+        if ev in (sg.WINDOW_CLOSE_ATTEMPTED_EVENT, "Chiudi"):
+            if worker is None or not worker.is_alive():
+                break
+            # Niente worker.join(): il thread comunica con window.write_event_value, che
+            # attende il ciclo di Tk. Si annullano i file rimanenti e si continua a leggere
+            # gli eventi fino a "-DONE-" (file già in lavorazione compresi)
+            if not closing:
+                closing = True
+                cancel_event.set()
+                window["-STOP-"].update(disabled=True)
+                window["-LOG-"].print("[STOP] Chiusura richiesta: attendo i file in lavorazione…")
+            continue
+
+        if ev == sg.TIMEOUT_KEY:
+            if closing and not worker.is_alive():
+                break
+            continue
+
+        if ev == "-PREWARM-":
+            result = vals[ev]
+            if isinstance(result, Exception):
+                window["-LOG-"].print(f"[WARN] Precaricamento dei moduli non riuscito: {result}")
+            elif args.import_times:
+                what = "moduli e processi" if args.prewarm_pool else "moduli"
+                window["-LOG-"].print(format_import_times(result, f"Precaricamento in background ({what})"))
+            continue
+
+        if ev == "-PROGRESS-":
+            done, total = vals[ev]
+            if total != pbar_max:
+                pbar_max = total
+                window["-PBAR-"].update(done, max=total)
+            else:
+                window["-PBAR-"].update(done)
+            continue
+
+        if ev == "-FILESTATUS-":
+            name, status = vals[ev]
+            window["-STATUS-"].update(f"{name}: {status}")
+            continue
+
+        if ev == "-DONE-":
+            if closing:
+                break
+            worker = None
+            cancel_event = None
+            window["-RUN-"].update(disabled=False)
+            window["-CHECK-"].update(disabled=False)
+            window["-STOP-"].update(disabled=True)
+            continue
+
+        if ev == "-STOP-":
+            if cancel_event is not None:
+                cancel_event.set()
+                window["-STOP-"].update(disabled=True)
+                window["-LOG-"].print("[STOP] Annullamento richiesto: attendo i file in lavorazione…")
+            continue
+
+        if ev == "-CHECK-":
+            if worker is not None:
+                continue
+            files = _selected_files(vals)
+            if files is not None:
+                cancel_event = threading.Event()
+                start(_run_validation, files, window, log_queue, cancel_event, warm, workers=read_workers(vals),
+                      engine=vals.get("-ENGINE-") or "auto")
+            continue
 
         if ev == "-RUN-":
-            # Priorità: se l'utente ha selezionato file specifici, usiamo quelli
-            files_str = (vals.get("-FILES-") or "").strip()
-            in_dir = Path(vals["-IN-"]) if vals.get("-IN-") else None
+            if worker is not None:
+                continue
             out_dir = Path(vals["-OUT-"]) if vals.get("-OUT-") else None
-            raw_mode = bool(vals.get("-RAW-"))
-            window["-LOG-"].update("")
-
             if not out_dir:
                 sg.popup_error("Seleziona una cartella output")
                 continue
+            files = _selected_files(vals)
+            if files is None:
+                continue
 
-            if files_str:
-                # Split robusto: ';' (Windows), virgola, newline
-                parts = re.split(r"[;\n,]+", files_str)
-                file_paths = [Path(p.strip().strip('"')) for p in parts if p.strip()]
-                _process_files(file_paths, out_dir, window, raw_mode=raw_mode)
-            else:
-                if not in_dir or not in_dir.exists():
-                    sg.popup_error("Seleziona una cartella input valida oppure scegli uno o più file in alto")
-                    continue
-                # Leggi tutti i .xls/.xlsx nella cartella
-                dir_files = sorted([p for p in in_dir.glob("*.xls*") if p.is_file()], key=lambda p: p.name.lower())
-                _process_files(dir_files, out_dir, window, raw_mode=raw_mode)
+            opts = dict(
+                raw_mode=bool(vals.get("-RAW-")),
+                workers=read_workers(vals),
+                incremental=bool(vals.get("-INCR-")),
+                engine=vals.get("-ENGINE-") or "auto",
+                only_required=bool(vals.get("-ONLYREQ-")),
+                extra_columns=[c.strip() for c in (vals.get("-EXTRA-") or "").split(",") if c.strip()],
+                compact=bool(vals.get("-COMPACT-")),
+                schema_version=2 if vals.get("-SCHEMA2-") else 1,
+                precompress=bool(vals.get("-PRECOMP-")),
+                fingerprint=bool(vals.get("-FINGERPRINT-")),
+                compact_dtypes=bool(vals.get("-DTYPES-")),
+                core=vals.get("-CORE-") or "auto",
+                cache_dir=default_cache_dir() if vals.get("-CACHE-") else None,
+            )
+            cancel_event = threading.Event()
+            start(_run_conversion, files, out_dir, window, log_queue, cancel_event, warm, **opts)
 
         if ev == "Apri output":
             path = vals.get("-OUT-")
             if path and Path(path).exists():
                 try:
-                    import os
                     os.startfile(path)  # Windows-only
                 except Exception:
                     sg.popup_error("Impossibile aprire la cartella output.")
             else:
                 sg.popup_error("Seleziona una cartella output valida.")
 
+    warm.close()
     window.close()
 
 
 if __name__ == "__main__":
+    # Necessario per ProcessPoolExecutor nell'EXE PyInstaller (onefile)
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Suite di benchmark del convertitore su Excel sintetici (vedi make_workbooks.py).
+
+Misura, prendendo il minimo su --repeat ripetizioni:
+  - read/<formato>/<motore>    read_excel_with_engine per ogni motore installato
+  - normalize                  normalize_df sul DataFrame letto
+  - write/<formato JSON>/<backend>  write_season_json (serializzazione + scrittura)
+  - e2e/<formato>/w<N>         process_files completo con 1 e N processi
+
+Ogni run viene aggiunto allo storico (--history, una riga JSON per run) e
+confrontato con l'ultimo run con gli stessi parametri (o con --baseline): le
+misure più lente di oltre --tolerance sono segnalate come REGRESSIONE e il
+codice di uscita diventa 1.
+
+Uso:
+    python benchmarks/bench_suite.py --rows 5000 --seasons 3
+    python benchmarks/bench_suite.py --rows 20000 --formats xlsx --repeat 5 --label calamine-0.3
+"""
+
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fcm_core
+from make_workbooks import FORMATS, make_season_set, xls_available
+
+DEFAULT_HISTORY = Path(__file__).resolve().parent / "bench_history.jsonl"
+# Sotto questa differenza (secondi) una misura più lenta è considerata rumore
+NOISE_FLOOR = 0.005
+
+
+def best_of(repeat, fn, setup=None):
+    """Tempo minimo (s) di fn() su repeat ripetizioni; setup() gira prima di ognuna, fuori dal tempo."""
+    best = None
+    for _ in range(max(1, repeat)):
+        args = (setup(),) if setup else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_suite(data_dir: Path, rows, seasons, formats, repeat, workers):
+    results = {}
+    sets = make_season_set(data_dir, rows=rows, seasons=seasons, formats=formats)
+
+    # Lettura: un file per formato, con ogni motore installato che lo supporta
+    for fmt, paths in sets.items():
+        for name, eng in fcm_core.EXCEL_ENGINES.items():
+            if f".{fmt}" in eng["suffixes"] and fcm_core.engine_available(name):
+                results[f"read/{fmt}/{name}"] = best_of(
+                    repeat, lambda p=paths[0], n=name: fcm_core.read_excel_with_engine(p, fcm_core.SHEET_NAME, n))
+
+    first = next(iter(sets.values()))[0]
+    raw = fcm_core.read_excel_with_engine(first, fcm_core.SHEET_NAME)
+    results["normalize"] = best_of(repeat, fcm_core.normalize_df, setup=raw.copy)
+
+    # Serializzazione + scrittura del JSON di stagione
+    df = fcm_core.normalize_df(raw.copy())
+    head = {"schema_version": 1, "season_label": "2020/2021", "season_key": "2020_2021",
+            "generated_at": "2020-01-01T00:00:00Z", "columns": list(df.columns)}
+    backends = ["json"] + (["orjson"] if fcm_core.json_backend("auto") == "orjson" else [])
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "season.json"
+        for layout, compact, positional in (("indent", False, False), ("compact", True, False),
+                                            ("schema2", True, True)):
+            for backend in backends:
+                results[f"write/{layout}/{backend}"] = best_of(
+                    repeat, lambda c=compact, b=backend, pos=positional: fcm_core.write_season_json(
+                        out, head, list(df.columns), fcm_core.frame_row_chunks(df),
+                        compact=c, backend=b, positional=pos))
+
+    # Conversione completa, cartella di output nuova a ogni ripetizione
+    dirs = []
+
+    def fresh_dir():
+        d = Path(tempfile.mkdtemp(prefix="fcm_bench_"))
+        dirs.append(d)
+        return d
+
+    try:
+        for fmt, paths in sets.items():
+            for w in sorted({1, workers}):
+                results[f"e2e/{fmt}/w{w}"] = best_of(
+                    repeat, lambda out_dir, p=paths, n=w: fcm_core.process_files(p, out_dir, workers=n),
+                    setup=fresh_dir)
+    finally:
+        for d in dirs:
+            shutil.rmtree(d, ignore_errors=True)
+    return results
+
+
+def environment():
+    import pandas as pd
+    engines = {name: fcm_core.engine_available(name) for name in fcm_core.EXCEL_ENGINES}
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "pandas": pd.__version__, "engines": engines, "json": fcm_core.json_backend("auto")}
+
+
+def load_history(path: Path):
+    if not path.is_file():
+        return []
+    runs = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            runs.append(json.loads(line))
+        except ValueError:
+            continue
+    return runs
+
+
+def compare(results, baseline, tolerance):
+    """Righe di confronto con baseline e lista delle misure in regressione."""
+    lines, regressions = [], []
+    lines.append(f"{'misura':<28}{'tempo (s)':>11}{'base (s)':>11}{'diff':>9}")
+    for name, sec in results.items():
+        base = (baseline or {}).get(name)
+        if base is None:
+            lines.append(f"{name:<28}{sec:>11.4f}{'-':>11}{'':>9}")
+            continue
+        delta = (sec - base) / base if base else 0.0
+        flag = ""
+        if sec > base * (1 + tolerance) and sec - base > NOISE_FLOOR:
+            flag = "  REGRESSIONE"
+            regressions.append(name)
+        lines.append(f"{name:<28}{sec:>11.4f}{base:>11.4f}{delta:>+9.0%}{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000, help="giocatori per file (default: %(default)s)")
+    parser.add_argument("--seasons", type=int, default=3, help="file/stagioni per formato (default: %(default)s)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=fcm_core.default_workers(),
+                        help="processi per la misura end-to-end parallela (default: %(default)s)")
+    parser.add_argument("--data", type=Path, default=Path(tempfile.gettempdir()) / "fcm_bench_data",
+                        help="cartella degli Excel generati, riusati tra i run (default: %(default)s)")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY,
+                        help="storico dei run, una riga JSON per run (default: %(default)s)")
+    parser.add_argument("--baseline", type=Path, help="run di riferimento (file JSON) invece dell'ultimo nello storico")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="rallentamento tollerato prima di segnalare una regressione (default: %(default)s = 20%%)")
+    parser.add_argument("--label", default="", help="etichetta del run (es. versione o ramo)")
+    parser.add_argument("--no-save", action="store_true", help="non aggiunge il run allo storico")
+    args = parser.parse_args(argv)
+
+    formats = list(args.formats)
+    if "xls" in formats and not xls_available():
+        print("[WARN] xlwt non installato: salto il formato .xls", file=sys.stderr)
+        formats.remove("xls")
+    if "xls" in formats and args.rows > 65535:
+        print("[WARN] Il formato .xls ammette al massimo 65535 righe: lo salto", file=sys.stderr)
+        formats.remove("xls")
+
+    params = {"rows": args.rows, "seasons": args.seasons, "formats": formats,
+              "repeat": args.repeat, "workers": args.workers}
+    results = run_suite(args.data, args.rows, args.seasons, formats, args.repeat, args.workers)
+    run = {"time": datetime.utcnow().isoformat(timespec="seconds") + "Z", "label": args.label,
+           "params": params, "env": environment(), "results": results}
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    else:
+        same = [r for r in load_history(args.history) if r.get("params") == params]
+        baseline = same[-1] if same else None
+    if baseline:
+        print(f"Confronto con il run del {baseline.get('time')} {baseline.get('label') or ''}".rstrip())
+    lines, regressions = compare(results, baseline and baseline.get("results"), args.tolerance)
+    print("\n".join(lines))
+
+    if not args.no_save:
+        with args.history.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+    if regressions:
+        print(f"[WARN] {len(regressions)} misure in regressione oltre il {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark lettore .xlsx: pd.read_excel(engine="openpyxl") vs lettore in streaming
+(fcm_core.read_xlsx_streaming).
+
+Ogni misura gira in un processo separato, così il picco di memoria (RSS) di un
+metodo non sporca quello dell'altro.
+
+Uso:
+    python benchmarks/bench_xlsx_reader.py "Lega 2024_2025 Tutti i dati.xlsx" [--repeat 3]
+"""
+
+import sys
+import json
+import time
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+METHODS = ("pandas_openpyxl", "streaming")
+
+
+def _child(method: str, path: Path, sheet: str):
+    import pandas as pd
+    import fcm_core
+
+    t0 = time.perf_counter()
+    if method == "pandas_openpyxl":
+        df = pd.read_excel(path, sheet_name=sheet, engine="openpyxl")
+    else:
+        df = fcm_core.read_xlsx_streaming(path, sheet)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({"seconds": elapsed, "peak_rss": fcm_core.peak_rss_bytes(), "rows": len(df)}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--sheet", default="Tutti i dati")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", choices=METHODS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        _child(args.child, args.path, args.sheet)
+        return 0
+
+    print(f"{'metodo':<18}{'righe':>8}{'tempo min (s)':>15}{'picco RSS (MB)':>16}")
+    for method in METHODS:
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            out = subprocess.run(
+                [sys.executable, __file__, str(args.path), "--sheet", args.sheet, "--child", method],
+                check=True, capture_output=True, text=True,
+            )
+            runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+        best = min(r["seconds"] for r in runs)
+        peaks = [r["peak_rss"] for r in runs if r["peak_rss"]]
+        peak = f"{max(peaks) / 2**20:.1f}" if peaks else "n/d"
+        print(f"{method:<18}{runs[0]['rows']:>8}{best:>15.3f}{peak:>16}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
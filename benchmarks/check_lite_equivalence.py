@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verifica che il motore di conversione lite (fcm_lite.py) produca gli stessi JSON
+del motore pandas.
+
+Converte gli stessi Excel con entrambi i motori, per ogni motore Excel installato
+e in più modalità (normale, RAW, compatto + schema 2, solo colonne obbligatorie),
+e confronta byte per byte i JSON di stagione (a parte "generated_at") e i dati di
+seasons.json (a parte orari e hash dei file, che contengono "generated_at").
+Gli Excel sono quelli indicati, più quelli sintetici di make_workbooks.py e uno
+"sporco" con valori misti (numeri come testo, celle vuote, booleani, #N/A,
+intestazioni vuote o ripetute) per mettere alla prova l'inferenza dei tipi.
+
+Misura anche il tempo di conversione con i due motori.
+
+Uso:
+    python benchmarks/check_lite_equivalence.py
+    python benchmarks/check_lite_equivalence.py "Lega 2024_2025 Tutti i dati.xlsx" --rows 2000
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fcm_core
+from make_workbooks import make_season_set, xls_available
+
+MODES = {
+    "normale": {},
+    "raw": {"raw_mode": True},
+    "compatto-schema2": {"compact": True, "schema_version": 2},
+    "solo-obbligatorie": {"only_required": True, "extra_columns": ["Extra"]},
+}
+# Orari della conversione, diversi tra un run e l'altro
+_TIMESTAMP_RE = re.compile(rb'"(generated_at|last_updated|last_changed)": ?"[^"]*"')
+# Campi di seasons.json che dipendono dagli orari (hash dei file che contengono "generated_at")
+_VOLATILE_KEYS = {"generated_at", "last_updated", "last_changed", "sha256", "etag"}
+# Non confrontati: stato interno e report della conversione
+_SKIPPED = {fcm_core.STATE_FILE, fcm_core.RUN_REPORT_FILE}
+
+# Valori "sporchi" per il foglio di prova: tutto ciò che l'inferenza dei tipi deve gestire
+MESSY_VALUES = [0, 1, 7, -3, 40, 6.25, 5.5, 0.125, 1e-05, 3.0, True, False, None,
+                "", " ", "6,25", "85%", "–", "-", "12", " 12 ", "1.5", "1e3", "NA", "n/a", "#N/A",
+                "#DIV/0!", "#REF!", "#VALUE!", "nan", "None", "true", "FALSE", "abc", "1,234.5", "0012", "inf"]
+
+
+def messy_workbook(path: Path, rows=300, seed=0):
+    """Excel .xlsx con le colonne obbligatorie, due extra (una senza nome), valori misti e celle di errore."""
+    import openpyxl
+
+    rnd = random.Random(seed)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(fcm_core.SHEET_NAME)
+    ws.append(fcm_core.REQUIRED_COLUMNS + ["Extra", None, "Extra"])
+    for i in range(rows):
+        row = []
+        for j in range(len(fcm_core.REQUIRED_COLUMNS) + 3):
+            # Ogni colonna pesca da un sottoinsieme diverso, così alcune restano numeriche
+            pool = MESSY_VALUES[(j * 7) % 23:(j * 7) % 23 + 4 + j % 12]
+            row.append(rnd.choice(pool) if rnd.random() < 0.9 else None)
+        ws.append(row)
+    wb.save(path)
+    return path
+
+
+def _stable(obj):
+    if isinstance(obj, dict):
+        return {k: _stable(v) for k, v in obj.items() if k not in _VOLATILE_KEYS}
+    if isinstance(obj, list):
+        return [_stable(v) for v in obj]
+    return obj
+
+
+def _normalized(path: Path):
+    """Contenuto confrontabile: byte senza orari per i JSON di stagione, dati stabili per seasons.json."""
+    if path.name == fcm_core.MANIFEST_FILE:
+        return _stable(json.loads(path.read_bytes()))
+    return _TIMESTAMP_RE.sub(rb'"\1":""', path.read_bytes())
+
+
+def compare_outputs(dir_a: Path, dir_b: Path):
+    """Differenze tra due cartelle di output (nomi dei file e contenuti dei JSON)."""
+    names_a = {p.name for p in dir_a.glob("*.json") if p.name not in _SKIPPED}
+    names_b = {p.name for p in dir_b.glob("*.json") if p.name not in _SKIPPED}
+    diffs = [f"solo in pandas: {n}" for n in sorted(names_a - names_b)]
+    diffs += [f"solo in lite: {n}" for n in sorted(names_b - names_a)]
+    for name in sorted(names_a & names_b):
+        if _normalized(dir_a / name) != _normalized(dir_b / name):
+            diffs.append(f"contenuto diverso: {name}")
+    return diffs
+
+
+def run_case(files, engine, options, workdir: Path):
+    """Converte files con i due motori; ritorna (differenze, secondi pandas, secondi lite)."""
+    seconds = {}
+    for core in ("pandas", "lite"):
+        out = workdir / core
+        shutil.rmtree(out, ignore_errors=True)
+        t0 = time.perf_counter()
+        fcm_core.process_files(files, out, workers=1, engine=engine, core=core, **options)
+        seconds[core] = time.perf_counter() - t0
+    return compare_outputs(workdir / "pandas", workdir / "lite"), seconds["pandas"], seconds["lite"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("files", nargs="*", type=Path, help="Excel da confrontare (oltre a quelli generati)")
+    parser.add_argument("--rows", type=int, default=1000, help="giocatori per Excel generato (default: %(default)s)")
+    parser.add_argument("--seasons", type=int, default=2, help="stagioni per formato (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="fcm_lite_eq_") as tmp:
+        tmp = Path(tmp)
+        formats = ["xlsx"] + (["xls"] if xls_available() else [])
+        sets = make_season_set(tmp / "data", rows=args.rows, seasons=args.seasons, formats=formats)
+        messy = messy_workbook(tmp / "data" / "Lega 2030_2031 Tutti i dati.xlsx", rows=args.rows)
+        inputs = {f"generati-{fmt}": paths for fmt, paths in sets.items()}
+        inputs["misti"] = [messy]
+        if args.files:
+            inputs["indicati"] = fcm_core.collect_input_files([str(p) for p in args.files])
+
+        failures = 0
+        print(f"{'file':<16}{'motore Excel':<14}{'modalità':<19}{'pandas (s)':>11}{'lite (s)':>10}  esito")
+        for label, files in inputs.items():
+            for engine, eng in fcm_core.EXCEL_ENGINES.items():
+                if not fcm_core.engine_available(engine):
+                    continue
+                if not all(p.suffix.lower() in eng["suffixes"] for p in files):
+                    continue
+                for mode, options in MODES.items():
+                    diffs, t_pandas, t_lite = run_case(files, engine, options, tmp / "out")
+                    failures += bool(diffs)
+                    print(f"{label:<16}{engine:<14}{mode:<19}{t_pandas:>11.3f}{t_lite:>10.3f}  "
+                          + ("OK" if not diffs else "DIVERSO"))
+                    for d in diffs:
+                        print(f"    {d}")
+
+    if failures:
+        print(f"[ERRORE] {failures} casi con JSON diversi tra pandas e lite")
+        return 1
+    print("[OK] JSON identici con i due motori di conversione")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
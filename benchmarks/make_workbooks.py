@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generatore di Excel sintetici come quelli esportati da FCM (foglio "Tutti i dati").
+
+Produce tutte le 34 colonne di REQUIRED_COLUMNS con i valori "sporchi" tipici
+dell'export: decimali con la virgola ("6,25"), percentuali in Aff% ("85%"),
+trattino lungo "–" al posto dei voti per chi non ha giocato, numeri a volte come
+testo. Stesso seed = stessi dati, così i benchmark sono confrontabili tra run.
+
+Uso:
+    python benchmarks/make_workbooks.py --out bench_data --rows 5000 --seasons 3
+    python benchmarks/make_workbooks.py --out bench_data --formats xlsx xls
+
+Il formato .xls richiede xlwt (pip install xlwt) ed è limitato a 65535 righe.
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fcm_core import FLOAT_COLS, INT_COLS, REQUIRED_COLUMNS, SHEET_NAME
+
+FORMATS = ("xlsx", "xls")
+XLS_MAX_ROWS = 65535
+
+TEAMS = ["Atalanta", "Bologna", "Cagliari", "Como", "Empoli", "Fiorentina", "Genoa", "Inter",
+         "Juventus", "Lazio", "Lecce", "Milan", "Monza", "Napoli", "Parma", "Roma", "Torino",
+         "Udinese", "Venezia", "Verona"]
+ROLES = ["P"] * 3 + ["D"] * 8 + ["C"] * 8 + ["A"] * 6
+FIRST = ["Marco", "Luca", "Andrea", "Matteo", "Lorenzo", "Davide", "Federico", "Nicolò",
+         "Alessandro", "Gianluca", "Riccardo", "Simone"]
+LAST = ["Rossi", "Bianchi", "Romano", "Colombo", "Ricci", "Marino", "Greco", "Bruno",
+        "Gallo", "Conti", "De Luca", "Costa", "Giordano", "Mancini", "Rizzo", "Lombardi"]
+DASH = "–"
+
+
+def _decimal(rnd: random.Random, lo, hi):
+    """Voto/fantamedia come li scrive FCM: testo con la virgola, a volte numero vero."""
+    v = round(rnd.uniform(lo, hi), 2)
+    return v if rnd.random() < 0.3 else f"{v:.2f}".replace(".", ",")
+
+
+def player_row(rnd: random.Random, i: int):
+    """Una riga di giocatore con tutte le colonne di REQUIRED_COLUMNS."""
+    played = rnd.random() > 0.2
+    row = {
+        "Nome": f"{rnd.choice(LAST)} {rnd.choice(FIRST)[0]}." + (" " if rnd.random() < 0.1 else ""),
+        "Sq": rnd.choice(TEAMS),
+        "R": rnd.choice(ROLES),
+        "COD": str(1000 + i),
+        "ID": 100000 + i,
+    }
+    for c in REQUIRED_COLUMNS:
+        if c in row:
+            continue
+        if c == "Aff%":
+            row[c] = f"{rnd.randint(0, 100)}%" if played else DASH
+        elif c in FLOAT_COLS:
+            row[c] = _decimal(rnd, 4.5, 8.5) if played else DASH
+        elif c in INT_COLS:
+            n = rnd.randint(0, 38) if c in ("T", "P") else rnd.choice([0, 0, 0, 1, 2, 3])
+            row[c] = (str(n) if rnd.random() < 0.1 else n) if played else rnd.choice([0, DASH])
+    return [row[c] for c in REQUIRED_COLUMNS]
+
+
+def make_workbook(path: Path, rows=600, seed=0):
+    """Scrive un Excel (.xlsx con openpyxl, .xls con xlwt) con il foglio SHEET_NAME e rows giocatori."""
+    rnd = random.Random(seed)
+    data = (player_row(rnd, i) for i in range(rows))
+    if path.suffix.lower() == ".xls":
+        if rows > XLS_MAX_ROWS:
+            raise ValueError(f"Il formato .xls ammette al massimo {XLS_MAX_ROWS} righe di dati")
+        import xlwt
+        wb = xlwt.Workbook(encoding="utf-8")
+        ws = wb.add_sheet(SHEET_NAME)
+        for j, name in enumerate(REQUIRED_COLUMNS):
+            ws.write(0, j, name)
+        for r, values in enumerate(data, start=1):
+            for j, v in enumerate(values):
+                ws.write(r, j, v)
+        wb.add_sheet("Riepilogo")
+        wb.save(str(path))
+    else:
+        import openpyxl
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet(SHEET_NAME)
+        ws.append(REQUIRED_COLUMNS)
+        for values in data:
+            ws.append(values)
+        wb.create_sheet("Riepilogo")
+        wb.save(path)
+    return path
+
+
+def make_season_set(out_dir: Path, rows=600, seasons=3, formats=("xlsx",), first_season=2020):
+    """
+    Una cartella di Excel "Lega YYYY_YYYY Tutti i dati.<fmt>", una stagione per
+    file e formato. Ogni formato/numero di righe ha la sua sottocartella (es.
+    "xlsx_600"), perché la stessa stagione due volte nella stessa cartella verrebbe
+    saltata; i file già presenti vengono riusati. Ritorna {formato: [percorsi]}.
+    """
+    out = {}
+    for fmt in formats:
+        folder = out_dir / f"{fmt}_{rows}"
+        folder.mkdir(parents=True, exist_ok=True)
+        out[fmt] = []
+        for k in range(seasons):
+            y = first_season + k
+            path = folder / f"Lega {y}_{y + 1} Tutti i dati.{fmt}"
+            if not path.exists():
+                make_workbook(path, rows=rows, seed=y)
+            out[fmt].append(path)
+    return out
+
+
+def xls_available():
+    try:
+        import xlwt  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="cartella di destinazione")
+    parser.add_argument("--rows", type=int, default=600, help="giocatori per file (default: %(default)s)")
+    parser.add_argument("--seasons", type=int, default=3, help="numero di stagioni (default: %(default)s)")
+    parser.add_argument("--first-season", type=int, default=2020, help="prima stagione (default: %(default)s)")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=["xlsx"])
+    args = parser.parse_args(argv)
+
+    formats = list(args.formats)
+    if "xls" in formats and not xls_available():
+        print("[WARN] xlwt non installato: salto il formato .xls", file=sys.stderr)
+        formats.remove("xls")
+    made = make_season_set(args.out, rows=args.rows, seasons=args.seasons, formats=formats,
+                           first_season=args.first_season)
+    for paths in made.values():
+        for p in paths:
+            print(p)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
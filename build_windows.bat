@@ -1,6 +1,12 @@
 @echo off
 setlocal EnableExtensions EnableDelayedExpansion
 set APP_NAME=FCM_Excel_2_JSON
+REM "build_windows.bat lite": EXE senza pandas/NumPy (motore di conversione lite, vedi fcm_lite.py)
+set EXCLUDES=
+if /i "%~1"=="lite" (
+  set APP_NAME=%APP_NAME%_lite
+  set EXCLUDES=--exclude-module pandas --exclude-module numpy
+)
 
 echo ===========================================
 echo  Build "%APP_NAME%" (solo EXE, no ZIP)
@@ -36,7 +42,7 @@ if exist build rmdir /s /q build
 
 REM 4) build EXE
 echo [STEP] Compilo eseguibile ...
-pyinstaller --noconfirm --clean --onefile --windowed app.py --name "%APP_NAME%" || goto :err
+pyinstaller --noconfirm --clean --onefile --windowed app.py --name "%APP_NAME%" %EXCLUDES% || goto :err
 
 if exist "dist\%APP_NAME%.exe" (
   echo.
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FCM – Excel → JSON da riga di comando (senza GUI)
+
+Usa lo stesso motore della GUI (fcm_core.process_files) ma non importa
+FreeSimpleGUI/tkinter: adatto a server Linux senza display e a cron.
+
+Esempi:
+    python -m fcm_convert --input D:\\FCM\\excel --output D:\\FCM\\json
+    python -m fcm_convert --input "Lega 2024_2025.xlsx" "Lega 2025_2026.xlsx" --output out --workers 4
+    python -m fcm_convert --input excel/ --output out --raw --quiet
+    python -m fcm_convert --input excel/ --check
+    python -m fcm_convert --input excel/ --output out --import-times
+    python -m fcm_convert --input excel/ --output out --cache --cache-size 1024
+
+Codici di uscita: 0 = tutto ok, 1 = almeno un file in errore, 2 = nessun file valido,
+130 = interrotto (Ctrl+C).
+"""
+
+import sys
+import argparse
+import multiprocessing
+from pathlib import Path
+
+from fcm_core import (CORE_CHOICES, DEFAULT_CACHE_MB, ENGINE_CHOICES, JSON_BACKENDS, LOG_LEVELS,
+                      SCHEMA_VERSIONS, collect_input_files, default_cache_dir, default_workers,
+                      format_import_times, prewarm_imports, process_files, validate_files)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="fcm_convert",
+        description="Converte gli Excel di FCM (foglio 'Tutti i dati') nei JSON per AstaMasterPro.",
+    )
+    parser.add_argument("--input", "-i", nargs="+", required=True, metavar="DIR|FILE",
+                        help="cartella con i file .xls/.xlsx oppure uno o più file")
+    parser.add_argument("--output", "-o", metavar="DIR",
+                        help="cartella di output per i JSON (obbligatoria tranne che con --check)")
+    parser.add_argument("--check", action="store_true",
+                        help="solo verifica: controlla foglio, colonne e stagioni senza convertire nulla")
+    parser.add_argument("--raw", action="store_true",
+                        help="modalità RAW: non normalizza numeri/percentuali")
+    parser.add_argument("--workers", "-w", type=int, default=default_workers(), metavar="N",
+                        help="processi paralleli (default: numero di core = %(default)s)")
+    parser.add_argument("--engine", choices=ENGINE_CHOICES, default="auto",
+                        help="motore Excel: auto = calamine se installato, poi openpyxl/xlrd (default: auto)")
+    parser.add_argument("--core", choices=CORE_CHOICES, default="auto",
+                        help="motore di conversione: pandas oppure lite (Python puro, senza pandas/NumPy), "
+                             "stesso JSON; auto = pandas se installato (default: auto)")
+    parser.add_argument("--only-required", action="store_true",
+                        help="legge e scrive solo le 34 colonne obbligatorie (più --extra-columns)")
+    parser.add_argument("--extra-columns", default="", metavar="COL1,COL2",
+                        help="colonne aggiuntive da mantenere con --only-required (separate da virgola)")
+    parser.add_argument("--compact", action="store_true",
+                        help="JSON compatto (minificato), senza indentazione")
+    parser.add_argument("--schema", type=int, choices=SCHEMA_VERSIONS, default=1,
+                        help="formato JSON: 1 = giocatori come oggetti, 2 = righe posizionali (default: 1)")
+    parser.add_argument("--precompress", action="store_true",
+                        help="scrive anche le copie .json.gz e .json.br (se brotli è installato) per il server statico")
+    parser.add_argument("--fingerprint", action="store_true",
+                        help="nomi file con impronta del contenuto (YYYY_YYYY.<hash8>.json) per cache immutabile")
+    parser.add_argument("--keep-generations", type=int, default=3, metavar="N",
+                        help="con --fingerprint: versioni per stagione da conservare, compresa la corrente "
+                             "(default: %(default)s)")
+    parser.add_argument("--compact-dtypes", action="store_true",
+                        help="tipi ridotti in memoria (interi piccoli, categorie, float32): meno RAM, stesso JSON")
+    parser.add_argument("--json-backend", choices=JSON_BACKENDS, default="auto",
+                        help="serializzatore JSON: auto = orjson se installato, altrimenti json (default: auto)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="salta i file invariati dall'ultima conversione (stato in conversion_state.json)")
+    parser.add_argument("--cache", action="store_true",
+                        help="riusa i fogli già letti dagli stessi Excel (cache su disco): cambiare "
+                             f"--raw o formato JSON non rilegge l'Excel (cartella: {default_cache_dir()})")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="cartella della cache dei fogli letti (implica --cache)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_MB, metavar="MB",
+                        help="dimensione massima della cache: oltre si rimuovono i fogli usati meno "
+                             "di recente (default: %(default)s)")
+    parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO",
+                        help="righe di log da mostrare e scrivere in conversion.log (default: INFO)")
+    parser.add_argument("--log-json", action="store_true",
+                        help="scrive anche conversion.jsonl (una riga JSON per messaggio)")
+    parser.add_argument("--import-times", action="store_true",
+                        help="stampa su stderr i tempi di importazione di pandas, motori Excel e orjson")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                        help="non stampa il log su stdout (resta in conversion.log)")
+    return parser
+
+
+def _split_columns(text: str):
+    return [c.strip() for c in text.split(",") if c.strip()]
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.check and not args.output:
+        parser.error("--output è obbligatorio (tranne che con --check)")
+
+    files = collect_input_files(args.input)
+    if args.import_times:
+        # La verifica legge solo le intestazioni: pandas non serve
+        timings = prewarm_imports("lite" if args.check else args.core, args.engine, args.json_backend)
+        print(format_import_times(timings), file=sys.stderr)
+
+    def on_log(line):
+        if not args.quiet:
+            print(line, flush=True)
+
+    if args.check:
+        report = validate_files(files, workers=max(1, args.workers), engine=args.engine, on_log=on_log)
+        if report["errors"]:
+            return 1
+        return 0 if report["ok"] else 2
+
+    cache_dir = Path(args.cache_dir) if args.cache_dir else (default_cache_dir() if args.cache else None)
+    try:
+        summary = process_files(files, Path(args.output), raw_mode=args.raw,
+                                workers=max(1, args.workers), incremental=args.incremental,
+                                engine=args.engine, only_required=args.only_required,
+                                extra_columns=_split_columns(args.extra_columns),
+                                compact=args.compact, json_backend=args.json_backend,
+                                schema_version=args.schema, precompress=args.precompress,
+                                fingerprint=args.fingerprint, keep_generations=max(1, args.keep_generations),
+                                compact_dtypes=args.compact_dtypes, core=args.core,
+                                cache_dir=cache_dir, cache_max_mb=max(1, args.cache_size),
+                                log_level=args.log_level, log_json=args.log_json, on_log=on_log)
+    except KeyboardInterrupt:
+        print("[STOP] Interrotto dall'utente.", file=sys.stderr)
+        return 130
+
+    if summary["errors"]:
+        return 1
+    if not summary["ok"] and not summary["unchanged"]:
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
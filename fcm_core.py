@@ -0,0 +1,1884 @@
+# -*- coding: utf-8 -*-
+"""
+FCM – Excel → JSON: motore di conversione (senza interfaccia grafica)
+
+Contiene lettura, validazione, normalizzazione e scrittura dei JSON, usati sia
+dalla GUI (app.py) sia dalla riga di comando (fcm_convert.py). Non importa
+FreeSimpleGUI/tkinter: l'avanzamento viene comunicato tramite callback.
+
+pandas/NumPy, i motori Excel e il pool di processi sono importati solo dalle
+funzioni che li usano: importare il modulo è quasi istantaneo (la GUI si apre
+subito, vedi prewarm_imports) e con il motore di conversione "lite"
+(fcm_lite.py) funziona anche senza pandas.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import json
+import math
+import time
+from pathlib import Path
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# ====== Costanti e configurazione ======
+
+SHEET_NAME = "Tutti i dati"
+
+REQUIRED_COLUMNS = [
+    "Nome","Sq","R","COD","FMld","T","P","Aff%",
+    "MVC","MVF","MVT","MVDSt","MVDlt","MVAnd","MVRnd",
+    "FMC","FMF","FMT","FMDSt","FMDlt","FMAnd","FMRnd",
+    "GF","GFR","GS","GSR","AG","AS","RP","RS","A","E","TIn","ID"
+]
+
+# Colonne tipizzate per normalizzazione (se RAW è disattivato)
+FLOAT_COLS = {
+    "FMld","Aff%","MVC","MVF","MVT","MVDSt","MVDlt","MVAnd","MVRnd",
+    "FMC","FMF","FMT","FMDSt","FMDlt","FMAnd","FMRnd"
+}
+INT_COLS = {"T","P","GF","GFR","GS","GSR","AG","AS","RP","RS","A","E","TIn"}
+STR_COLS = {"Nome","Sq","R","COD","ID"}  # ID trattato come stringa
+
+# Versione del convertitore: va incrementata quando cambia il contenuto dei JSON
+# generati, così la modalità incrementale riconverte tutto.
+CONVERTER_VERSION = 1
+
+# Stato della modalità incrementale (nella cartella di output)
+STATE_FILE = "conversion_state.json"
+
+# Formati dei JSON di stagione:
+#  1 = "players" come lista di oggetti {colonna: valore} (default, compatibile)
+#  2 = "players" come lista di righe posizionali [v1, v2, ...] nell'ordine di "columns"
+SCHEMA_VERSIONS = (1, 2)
+
+# Manifest delle stagioni (nella cartella di output)
+MANIFEST_FILE = "seasons.json"
+
+# Report della conversione (tempi per fase, righe, byte, memoria) nella cartella di output
+RUN_REPORT_FILE = "run_report.json"
+# Cache dei fogli letti (vedi sheet_cache_key): versione del formato dei file in
+# cache, da incrementare se cambia ciò che vi viene salvato; dimensione massima di default
+SHEET_CACHE_VERSION = 1
+SHEET_CACHE_SUFFIX = ".sheet.pkl"
+DEFAULT_CACHE_MB = 512
+
+# Fasi misurate per ogni file (secondi in "seconds" delle statistiche di _convert_file)
+RUN_STAGES = ("read", "validate", "normalize", "write", "compress", "hash")
+
+
+# ====== Utility ======
+
+def extract_season_from_filename(stem: str):
+    """
+    Estrae la stagione dal nome file con pattern:
+      - 2021_2022
+      - 2021-2022
+      - 2021/2022
+    Ritorna: (season_label '2021/2022', season_key '2021_2022')
+    """
+    m = re.search(r"(20\d{2})\s*[_/\-]\s*(20\d{2})", stem)
+    if not m:
+        raise ValueError("Impossibile estrarre la stagione dal nome file (atteso pattern YYYY_YYYY)")
+    y1, y2 = m.group(1), m.group(2)
+    return f"{y1}/{y2}", f"{y1}_{y2}"
+
+
+def iter_sheet_rows_xlsx(fp: Path, sheet_name: str):
+    """
+    Legge un .xlsx in streaming: openpyxl in modalità read-only,
+    apre direttamente il foglio richiesto (senza stili né altri fogli) e
+    restituisce le righe (tuple di valori, None per le celle vuote) una alla volta.
+    Le celle di errore (#DIV/0!, #REF!, ...) diventano NaN, come in pandas.read_excel.
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(fp, read_only=True, data_only=True, keep_links=False)
+    try:
+        if sheet_name not in wb.sheetnames:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        ws = wb[sheet_name]
+        ws.reset_dimensions()  # alcune esportazioni dichiarano dimensioni errate
+        # values_only perderebbe il tipo di cella: gli errori arriverebbero come testo
+        for row in ws.iter_rows():
+            yield tuple(math.nan if c.data_type == "e" else c.value for c in row)
+    finally:
+        wb.close()
+
+
+def _excel_cell_value(v):
+    """Converte un valore di cella come fa pandas.read_excel (vuoto -> "", float intero -> int)."""
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        return int(v)
+    return v
+
+
+def _rows_openpyxl(fp: Path, sheet_name: str, usecols=None):
+    """
+    Righe del foglio .xlsx (da iter_sheet_rows_xlsx) come le passa pandas.read_excel
+    al suo parser: celle convertite con _excel_cell_value, celle e righe vuote
+    finali scartate, righe completate con "" alla stessa larghezza.
+    Con usecols (lista di nomi) le altre colonne vengono scartate già durante la lettura.
+    """
+    data = []
+    last_row_with_data = -1
+    keep = None  # indici delle colonne da tenere (proiezione)
+    for row in iter_sheet_rows_xlsx(fp, sheet_name):
+        converted = [_excel_cell_value(v) for v in row]
+        while converted and converted[-1] == "":
+            converted.pop()
+        if converted:
+            last_row_with_data = len(data)
+        if usecols is not None:
+            if keep is None:
+                wanted = set(usecols)
+                keep = [i for i, name in enumerate(converted) if name in wanted]
+            converted = [converted[i] if i < len(converted) else "" for i in keep]
+        data.append(converted)
+    del data[last_row_with_data + 1:]
+
+    width = max((len(r) for r in data), default=0)
+    for r in data:
+        if len(r) < width:
+            r.extend([""] * (width - len(r)))
+    return data
+
+
+def read_xlsx_streaming(fp: Path, sheet_name: str, usecols=None):
+    """
+    Costruisce il DataFrame del foglio a partire da iter_sheet_rows_xlsx.
+    Stessa semantica di pd.read_excel(engine="openpyxl") (righe/celle vuote
+    finali scartate, inferenza dei tipi di pandas), ma senza caricare il modello
+    completo delle celle: più veloce e con meno memoria sui file grandi.
+    Con usecols (lista di nomi) le altre colonne vengono scartate già durante la lettura.
+    """
+    import pandas as pd
+    from pandas.io.parsers import TextParser
+
+    data = _rows_openpyxl(fp, sheet_name, usecols)
+    if not data:
+        return pd.DataFrame()
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+def _header_names(values):
+    """Nomi di colonna dalla riga di intestazione (celle vuote finali scartate, vuote -> "Unnamed: i")."""
+    values = [_excel_cell_value(v) for v in values]
+    while values and values[-1] == "":
+        values.pop()
+    return [v if v != "" else f"Unnamed: {i}" for i, v in enumerate(values)]
+
+
+def _header_openpyxl(fp: Path, sheet_name: str):
+    rows = iter_sheet_rows_xlsx(fp, sheet_name)
+    try:
+        return _header_names(next(rows, ()))
+    finally:
+        rows.close()
+
+
+def _read_calamine(fp: Path, sheet_name: str, usecols=None):
+    import pandas as pd
+    return pd.read_excel(fp, sheet_name=sheet_name, engine="calamine", usecols=usecols)
+
+
+def _rows_calamine(fp: Path, sheet_name: str, usecols=None):
+    """Righe del foglio con calamine, celle convertite come in pandas.read_excel (float intero -> int)."""
+    import python_calamine
+
+    wb = python_calamine.CalamineWorkbook.from_path(str(fp))
+    if sheet_name not in wb.sheet_names:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    rows = wb.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False)
+    return [[int(v) if isinstance(v, float) and v.is_integer() else v for v in row] for row in rows]
+
+
+def _header_calamine(fp: Path, sheet_name: str):
+    import python_calamine
+
+    wb = python_calamine.CalamineWorkbook.from_path(str(fp))
+    if sheet_name not in wb.sheet_names:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    rows = wb.get_sheet_by_name(sheet_name).to_python(skip_empty_area=False, nrows=1)
+    return _header_names(rows[0] if rows else ())
+
+
+def _read_xlrd(fp: Path, sheet_name: str, usecols=None):
+    import pandas as pd
+    return pd.read_excel(fp, sheet_name=sheet_name, engine="xlrd", usecols=usecols)
+
+
+def _rows_xlrd(fp: Path, sheet_name: str, usecols=None):
+    """Righe del foglio .xls con xlrd, celle convertite come in pandas.read_excel."""
+    import xlrd
+
+    book = xlrd.open_workbook(str(fp), on_demand=True)
+    try:
+        if sheet_name not in book.sheet_names():
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        sheet = book.sheet_by_name(sheet_name)
+        data = []
+        for i in range(sheet.nrows):
+            row = []
+            for v, typ in zip(sheet.row_values(i), sheet.row_types(i)):
+                if typ == xlrd.XL_CELL_DATE:
+                    try:
+                        v = xlrd.xldate.xldate_as_datetime(v, book.datemode)
+                    except OverflowError:
+                        pass
+                    else:
+                        # Date sul giorno zero dell'epoca Excel: solo orario
+                        if v.timetuple()[:3] == ((1904, 1, 1) if book.datemode else (1899, 12, 31)):
+                            v = v.time()
+                elif typ == xlrd.XL_CELL_ERROR:
+                    v = math.nan
+                elif typ == xlrd.XL_CELL_BOOLEAN:
+                    v = bool(v)
+                elif typ == xlrd.XL_CELL_NUMBER and math.isfinite(v) and v.is_integer():
+                    v = int(v)
+                row.append(v)
+            data.append(row)
+        return data
+    finally:
+        book.release_resources()
+
+
+def _header_xlrd(fp: Path, sheet_name: str):
+    import xlrd
+
+    book = xlrd.open_workbook(str(fp), on_demand=True)
+    try:
+        if sheet_name not in book.sheet_names():
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        sheet = book.sheet_by_name(sheet_name)
+        return _header_names(sheet.row_values(0) if sheet.nrows else ())
+    finally:
+        book.release_resources()
+
+
+# Motori di lettura Excel: nome -> modulo Python richiesto, estensioni supportate,
+# lettura del foglio (DataFrame), righe grezze per il motore lite (fcm_lite.py)
+# e lettura della sola riga di intestazione
+EXCEL_ENGINES = {
+    "calamine": {"module": "python_calamine", "suffixes": (".xls", ".xlsx"),
+                 "read": _read_calamine, "rows": _rows_calamine, "header": _header_calamine},
+    "openpyxl": {"module": "openpyxl", "suffixes": (".xlsx",),
+                 "read": read_xlsx_streaming, "rows": _rows_openpyxl, "header": _header_openpyxl},
+    "xlrd": {"module": "xlrd", "suffixes": (".xls",),
+             "read": _read_xlrd, "rows": _rows_xlrd, "header": _header_xlrd},
+}
+ENGINE_CHOICES = ("auto",) + tuple(EXCEL_ENGINES)
+
+
+def engine_available(name: str):
+    """True se il modulo del motore è installato (senza importarlo)."""
+    import importlib.util
+    return importlib.util.find_spec(EXCEL_ENGINES[name]["module"]) is not None
+
+
+def engine_candidates(fp: Path, engine="auto"):
+    """
+    Motori da provare, in ordine, per il file fp.
+    "auto": calamine (se installato) e poi openpyxl per .xlsx / xlrd per .xls;
+    un nome esplicito forza quel solo motore.
+    """
+    if engine != "auto":
+        if engine not in EXCEL_ENGINES:
+            raise ValueError(f"Motore sconosciuto '{engine}' (validi: {', '.join(ENGINE_CHOICES)})")
+        return [engine]
+    suffix = fp.suffix.lower()
+    fallback = "openpyxl" if suffix == ".xlsx" else "xlrd"  # .xls (o altro legacy -> proviamo xlrd)
+    return [name for name in ("calamine", fallback) if name == fallback or engine_available(name)]
+
+
+def _with_engines(fp: Path, engine, op: str, *args, **kwargs):
+    """
+    Esegue l'operazione op ("read" | "rows" | "header") con il primo motore disponibile tra
+    engine_candidates: se un motore non è installato o fallisce si passa al successivo.
+    Ritorna (risultato, motore usato, note sui fallback).
+    """
+    notes = []
+    candidates = engine_candidates(fp, engine)
+    for n, name in enumerate(candidates, start=1):
+        try:
+            return EXCEL_ENGINES[name][op](fp, *args, **kwargs), name, notes
+        except Exception as e:
+            if n == len(candidates):
+                raise
+            notes.append(f"{name} non riuscito ({e}), provo {candidates[n]}")
+
+
+def read_sheet(fp: Path, sheet_name: str, engine="auto", usecols=None):
+    """
+    Legge il foglio come DataFrame (solo le colonne in usecols, se indicato).
+    Ritorna (DataFrame, motore usato, note sui fallback); vedi _with_engines.
+    """
+    return _with_engines(fp, engine, "read", sheet_name, usecols=usecols)
+
+
+def read_header(fp: Path, sheet_name: str, engine="auto"):
+    """
+    Legge solo la riga di intestazione del foglio, senza analizzare il resto.
+    Ritorna (lista nomi colonna, motore usato, note sui fallback).
+    """
+    return _with_engines(fp, engine, "header", sheet_name)
+
+
+# Motore di conversione: "pandas" (DataFrame, fcm_core) oppure "lite" (Python puro,
+# fcm_lite.py: avvio più rapido, meno memoria, EXE più piccolo); stesso JSON
+CORE_CHOICES = ("auto", "pandas", "lite")
+
+
+def conversion_core(name="auto"):
+    """Risolve il motore di conversione: "auto" = pandas se installato, altrimenti lite."""
+    if name not in CORE_CHOICES:
+        raise ValueError(f"Motore di conversione sconosciuto '{name}' (validi: {', '.join(CORE_CHOICES)})")
+    if name == "auto":
+        import importlib.util
+        return "pandas" if importlib.util.find_spec("pandas") is not None else "lite"
+    return name
+
+
+def prewarm_imports(core="auto", engine="auto", backend="auto"):
+    """
+    Importa in anticipo i moduli pesanti che la conversione userà: NumPy/pandas
+    (solo con il motore di conversione pandas), i motori Excel installati (o
+    quello scelto) e orjson. Pensata per un thread in background appena aperta
+    la finestra, così la prima conversione non paga il caricamento.
+    Ritorna {modulo: secondi di importazione} (0.0 se era già caricato).
+    """
+    import importlib
+
+    names = ["numpy", "pandas"] if conversion_core(core) == "pandas" else []
+    for name in EXCEL_ENGINES if engine == "auto" else [engine]:
+        if engine_available(name):
+            names.append(EXCEL_ENGINES[name]["module"])
+    if json_backend(backend) == "orjson":
+        names.append("orjson")
+    timings = {}
+    for name in names:
+        t0 = time.perf_counter()
+        if name not in sys.modules:
+            importlib.import_module(name)
+        timings[name] = time.perf_counter() - t0
+    return timings
+
+
+def format_import_times(timings, label="Importazione moduli"):
+    """Riga di log con i tempi di prewarm_imports (o {nome: secondi} misurati altrove)."""
+    parts = ", ".join(f"{name} {sec:.3f}s" for name, sec in timings.items())
+    return f"[INFO] {label}: {parts or '-'} (totale {sum(timings.values()):.3f}s)"
+
+
+def read_excel_with_engine(fp: Path, sheet_name: str, engine="auto"):
+    """
+    Legge il foglio come DataFrame (vedi read_sheet): calamine se installato,
+    altrimenti openpyxl (in streaming) per .xlsx e xlrd per .xls.
+    """
+    return read_sheet(fp, sheet_name, engine)[0]
+
+
+# Pulizia dei decimali in testo: via "%", "–" e "-", virgola -> punto (una sola passata)
+_FLOAT_TRANSLATION = str.maketrans({"%": None, ",": ".", "–": None, "-": None})
+
+
+def clean_float_column(s: pd.Series, decimals=2):
+    """
+    Pulizia di una colonna di FLOAT_COLS: stesso risultato (valori e dtype) di
+    astype(str) -> strip -> rimozione di "%", "–", "-" e virgola -> punto ->
+    to_numeric(errors="coerce") -> round(decimals), ma:
+    - colonna già numerica (float64/int64, tipico con calamine): niente stringhe;
+      togliere il "-" equivale al valore assoluto
+    - colonna di testo/mista: una passata di str.translate invece di quattro
+      replace, e solo sui valori distinti
+    Restano sul percorso lento i numeri che come testo sarebbero in notazione
+    esponenziale negativa (es. 1e-05 -> "1e05"), per avere risultati identici.
+    """
+    import numpy as np
+    import pandas as pd
+
+    # Colonne vuote sul percorso di testo: il dtype del risultato lo decide to_numeric
+    if len(s) and s.dtype == "float64":
+        a = np.abs(s.to_numpy())
+        if not ((a > 0) & (a < 1e-4)).any():
+            return pd.Series(a, index=s.index, name=s.name).round(decimals)
+    elif len(s) and s.dtype == "int64" and s.min() > np.iinfo(np.int64).min:
+        return s.abs()
+    # Voti e medie si ripetono molto: si puliscono e convertono solo i valori distinti
+    codes, uniques = pd.factorize(s.astype(str).to_numpy())
+    cleaned = np.array([t.strip().translate(_FLOAT_TRANSLATION) for t in uniques], dtype=object)
+    values = pd.to_numeric(cleaned, errors="coerce")
+    return pd.Series(values[codes], index=s.index, name=s.name).round(decimals)
+
+
+def clean_int_column(s: pd.Series):
+    """Colonna di INT_COLS: coerzione numerica (solo se serve), NaN -> 0, interi."""
+    if s.dtype == object:
+        import pandas as pd
+        s = pd.to_numeric(s, errors="coerce")
+    if s.hasnans:
+        s = s.fillna(0)
+    return s.astype(int)
+
+
+def clean_str_column(s: pd.Series):
+    """Colonna di STR_COLS: testo senza spazi iniziali/finali."""
+    return s.astype(str).str.strip()
+
+
+class ColumnRule(NamedTuple):
+    """
+    Regola di normalizzazione di una colonna (vedi normalization_plan): dice cosa
+    ottenere, non come. I passi li sceglie il pulitore del tipo (_CLEANERS, qui e in
+    fcm_lite.py) in base al dtype della colonna: per esempio clean_float_column
+    salta la conversione in testo se la colonna è già numerica.
+    """
+    column: str
+    kind: str                    # "str" | "float" | "int" | "keep" (colonna extra, lasciata com'è)
+    decimals: int | None = None  # cifre decimali, solo per "float"
+
+
+# Tipo di colonna -> cifre decimali della regola
+_RULES = {"str": None, "float": 2, "int": None, "keep": None}
+_CLEANERS = {
+    "str": lambda s, rule: clean_str_column(s),
+    "float": lambda s, rule: clean_float_column(s, rule.decimals),
+    "int": lambda s, rule: clean_int_column(s),
+}
+
+
+@lru_cache(maxsize=64)
+def normalization_plan(columns: tuple):
+    """
+    Piano di normalizzazione per un'intestazione: una ColumnRule per colonna, nel
+    loro ordine, ricavata da STR_COLS / FLOAT_COLS / INT_COLS. È in cache per
+    intestazione, quindi calcolato una volta per processo e riusato per tutti i
+    file del batch con le stesse colonne.
+    """
+    plan = []
+    for c in columns:
+        kind = "str" if c in STR_COLS else "float" if c in FLOAT_COLS else "int" if c in INT_COLS else "keep"
+        plan.append(ColumnRule(c, kind, _RULES[kind]))
+    return tuple(plan)
+
+
+def normalize_df(df: pd.DataFrame):
+    """
+    Normalizza tipi (una passata sulle colonne, secondo normalization_plan):
+    - Trim stringhe note
+    - Float: converte virgola -> punto, rimuove %, caratteri non numerici; arrotonda a 2 decimali
+    - Interi: coerzione numerica, NaN -> 0
+    Mantiene tutte le colonne (anche eventuali extra).
+    """
+    for rule in normalization_plan(tuple(df.columns)):
+        if rule.kind != "keep":
+            df[rule.column] = _CLEANERS[rule.kind](df[rule.column], rule)
+    return df
+
+
+# Colonne testuali con pochi valori distinti, tenute come categoriche in compact_dtypes
+CATEGORY_COLS = {"Sq", "R"}
+# Sotto questo valore assoluto un float32 ha abbastanza cifre (7 significative) perché,
+# riportato a float64 e arrotondato a 2 decimali, ridia esattamente il valore originale
+FLOAT32_MAX_ABS = 1e4
+
+
+def compact_dtypes(df: pd.DataFrame):
+    """
+    Riduce la memoria di un DataFrame già normalizzato (normalize_df):
+    - INT_COLS al tipo intero più piccolo che contiene i valori (int8/int16/...)
+    - CATEGORY_COLS (Sq, R) come categoriche
+    - FLOAT_COLS in float32 se tutti i valori finiti sono sotto FLOAT32_MAX_ABS
+    Il JSON non cambia: frame_row_chunks riporta i float32 a float64 arrotondati a 2 decimali.
+    """
+    import numpy as np
+    import pandas as pd
+
+    for rule in normalization_plan(tuple(df.columns)):
+        s = df[rule.column]
+        if rule.kind == "int":
+            df[rule.column] = pd.to_numeric(s, downcast="integer")
+        elif rule.kind == "float" and s.dtype == "float64":
+            finite = s.to_numpy()[np.isfinite(s.to_numpy())]
+            if not (np.abs(finite) >= FLOAT32_MAX_ABS).any():
+                df[rule.column] = s.astype("float32")
+        elif rule.column in CATEGORY_COLS:
+            df[rule.column] = s.astype("category")
+    return df
+
+
+def ensure_required_columns(df: pd.DataFrame):
+    """Ritorna la lista di colonne mancanti rispetto a REQUIRED_COLUMNS."""
+    return missing_columns(df.columns)
+
+
+def missing_columns(columns):
+    """Come ensure_required_columns, ma su una lista di nomi (es. la sola intestazione)."""
+    present = set(columns)
+    return [c for c in REQUIRED_COLUMNS if c not in present]
+
+
+def projected_columns(extra_columns=()):
+    """Colonne da leggere con la proiezione attiva: REQUIRED_COLUMNS + extra ammessi."""
+    return REQUIRED_COLUMNS + [c for c in extra_columns if c not in REQUIRED_COLUMNS]
+
+
+# Serializzatori JSON: orjson (se installato, molto più veloce) oppure json della libreria standard
+JSON_BACKENDS = ("auto", "orjson", "json")
+
+
+def json_backend(name="auto"):
+    """Risolve il serializzatore da usare: "auto" sceglie orjson se installato."""
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"Serializzatore JSON sconosciuto '{name}' (validi: {', '.join(JSON_BACKENDS)})")
+    if name == "auto":
+        import importlib.util
+        return "orjson" if importlib.util.find_spec("orjson") is not None else "json"
+    return name
+
+
+def _json_safe(obj):
+    """NaN/infinito -> None, come fa orjson (NaN non è JSON valido per JSON.parse)."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: _json_safe(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_safe(v) for v in obj]
+    return obj
+
+
+def dumps_json(data, compact=False, backend="auto"):
+    """
+    Serializza data in byte UTF-8. Indentato a 2 spazi (default) oppure compatto
+    (minificato). Chiavi non testuali (es. una colonna "2024" letta come numero)
+    diventano stringhe con entrambi i serializzatori.
+    L'output dei due serializzatori coincide tranne per i float in notazione
+    esponenziale (|x| < 1e-4 o >= 1e16): 1e-05 con json, 0.00001 con orjson. Per
+    questo il serializzatore effettivo fa parte delle opzioni della conversione e
+    di "content_sha256" (vedi write_season_json).
+    Date e orari (es. celle data in colonne extra) sono rifiutati da entrambi, come
+    i Timestamp di pandas: orjson altrimenti li scriverebbe con il motore lite, che
+    darebbe un JSON dove il motore pandas si ferma con un errore.
+    """
+    if json_backend(backend) == "orjson":
+        import orjson
+        option = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                  | (0 if compact else orjson.OPT_INDENT_2))
+        return orjson.dumps(data, option=option)
+    if compact:
+        text = json.dumps(_json_safe(data), ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+    else:
+        text = json.dumps(_json_safe(data), ensure_ascii=False, indent=2, allow_nan=False)
+    return text.encode("utf-8")
+
+
+def _fsync_dir(directory: Path):
+    """
+    fsync della cartella, così anche la rinomina sopravvive a un crash/mancanza di
+    corrente (POSIX). Su Windows le cartelle non si possono aprire così: non serve.
+    """
+    if os.name == "nt":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_durable(tmp: Path, path: Path):
+    """Rinomina tmp (già scritto e fsync-ato, stessa cartella) su path e rende persistente la rinomina."""
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+# umask del processo, letta una volta all'importazione: os.umask si legge solo
+# cambiandola, e farlo durante la conversione (thread della GUI, prewarm) darebbe
+# permessi sbagliati ai file creati nel frattempo dagli altri thread
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_bytes_atomic(path: Path, data: bytes):
+    """
+    Scrive data su un file temporaneo nella stessa cartella di path, fa fsync e lo
+    rinomina sul file finale: chi legge (anche durante la conversione, o dopo un
+    processo interrotto a metà) vede il vecchio o il nuovo contenuto, mai un file troncato.
+    """
+    import tempfile
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp crea il file con permessi 0600: si riportano a quelli di un file normale
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        replace_durable(Path(tmp), path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path: Path, data: dict, compact=False, backend="auto"):
+    """Serializza data (vedi dumps_json) e lo scrive in modo atomico (vedi write_bytes_atomic)."""
+    write_bytes_atomic(path, dumps_json(data, compact=compact, backend=backend))
+
+
+def frame_row_chunks(df: pd.DataFrame, chunk_rows=2000):
+    """
+    Righe del DataFrame a blocchi di chunk_rows (liste di tuple di valori Python),
+    ricavate dagli array di colonna: niente lista completa di dict come to_dict(orient="records").
+    Le colonne float32 (vedi compact_dtypes) tornano float64 arrotondate a 2 decimali.
+    """
+    for start in range(0, len(df), chunk_rows):
+        part = df.iloc[start:start + chunk_rows]
+        cols = []
+        for j in range(part.shape[1]):
+            col = part.iloc[:, j]
+            if col.dtype == "float32":
+                col = col.astype("float64").round(2)
+            cols.append(col.tolist())
+        yield list(zip(*cols))
+
+
+def write_season_json(path: Path, head: dict, columns: list, row_chunks, compact=False, backend="auto",
+                      positional=False, volatile_keys=("generated_at",)):
+    """
+    Scrittura in streaming del JSON di stagione: prima i campi di head (compreso
+    "columns"), poi i giocatori blocco per blocco direttamente su file, senza
+    costruire in memoria il documento completo. Il risultato è identico byte per
+    byte a write_json(path, {**head, "players": [dict per riga]}), oppure con
+    positional=True (schema_version 2) a {**head, "players": [lista di valori per riga]}.
+    row_chunks: iterabile di blocchi di righe (sequenze di valori nell'ordine di columns).
+    Ritorna {"rows": righe scritte, "bytes": dimensione del file, "sha256": hash dei
+    byte scritti, "content_sha256": hash dei soli dati, cioè senza i campi di head
+    in volatile_keys (es. generated_at), più il serializzatore usato (vedi
+    dumps_json): cambia solo se cambiano i dati o il serializzatore}.
+    Scrive direttamente su path (fsync compreso): il chiamante passa un file
+    temporaneo e lo rinomina con replace_durable.
+    """
+    import hashlib
+
+    head_bytes = dumps_json(head, compact=compact, backend=backend)
+    stable_head = {k: v for k, v in head.items() if k not in volatile_keys}
+    h_file = hashlib.sha256()
+    h_content = hashlib.sha256(json_backend(backend).encode("ascii") + b"\n")
+    h_content.update(dumps_json(stable_head, compact=compact, backend=backend))
+    rows = 0
+    with path.open("wb") as out:
+        def emit(b, count_in_content=True):
+            # Scrive b aggiornando gli hash; head (con generated_at) non entra in content_sha256
+            h_file.update(b)
+            if count_in_content:
+                h_content.update(b)
+            out.write(b)
+
+        if compact:
+            emit(head_bytes[:-1], count_in_content=False)
+            emit(b',"players":[')
+        else:
+            emit(head_bytes[:-2], count_in_content=False)
+            emit(b',\n  "players": [')
+        for chunk in row_chunks:
+            if not chunk:
+                continue
+            if positional:
+                records = [list(r) for r in chunk]
+            else:
+                records = [dict(zip(columns, r)) for r in chunk]
+            body = dumps_json(records, compact=compact, backend=backend)
+            if compact:
+                emit((b"," if rows else b"") + body[1:-1])
+            else:
+                # Righe del blocco ("[\n  {...}\n]") reindentate di 2 spazi dentro "players"
+                emit((b",\n  " if rows else b"\n  ") + body[2:-2].replace(b"\n", b"\n  "))
+            rows += len(chunk)
+        if compact:
+            emit(b"]}")
+        else:
+            emit(b"\n  ]\n}" if rows else b"]\n}")
+        nbytes = out.tell()
+        out.flush()
+        os.fsync(out.fileno())
+    return {"rows": rows, "bytes": nbytes, "sha256": h_file.hexdigest(),
+            "content_sha256": h_content.hexdigest()}
+
+
+# Copie precompresse accanto a ogni JSON: formato -> estensione
+SIDECAR_SUFFIXES = {"gzip": ".gz", "br": ".br"}
+
+
+def write_sidecars(path: Path, enabled=True, data: bytes = None):
+    """
+    Scrive accanto a path le copie precompresse "<file>.gz" (gzip livello 9) e,
+    se il modulo brotli è installato, "<file>.br" (qualità 11), da servire così
+    come sono dal server statico. L'output è deterministico (mtime gzip = 0).
+    Con enabled=False rimuove eventuali copie rimaste da conversioni precedenti,
+    che altrimenti verrebbero servite con contenuto vecchio.
+    data: contenuto da comprimere, se path non è ancora stato scritto (default:
+    letto da path). Ogni copia è scritta in modo atomico (vedi write_bytes_atomic).
+    Ritorna {formato: {"file", "bytes", "sha256"}} per le copie scritte.
+    """
+    import hashlib
+
+    info = {}
+    if not enabled:
+        for suffix in SIDECAR_SUFFIXES.values():
+            sidecar = path.with_name(path.name + suffix)
+            if sidecar.exists():
+                sidecar.unlink()
+        return info
+
+    if data is None:
+        data = path.read_bytes()
+    compressed = compress_sidecars(data)
+    if "br" not in compressed:
+        stale = path.with_name(path.name + SIDECAR_SUFFIXES["br"])
+        if stale.exists():
+            stale.unlink()
+
+    for fmt, blob in compressed.items():
+        sidecar = path.with_name(path.name + SIDECAR_SUFFIXES[fmt])
+        write_bytes_atomic(sidecar, blob)
+        info[fmt] = {"file": sidecar.name, "bytes": len(blob), "sha256": hashlib.sha256(blob).hexdigest()}
+    return info
+
+
+def compress_sidecars(data: bytes):
+    """Contenuto delle copie precompresse di data: {"gzip": ..., "br": ... (se brotli è installato)}."""
+    import gzip
+
+    compressed = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        compressed["br"] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    return compressed
+
+
+def stage_sidecars(path: Path, enabled, data: bytes, suffix: str):
+    """
+    Come write_sidecars, ma senza toccare le copie pubblicate: quelle nuove sono
+    scritte come "<copia><suffix>" e quelle da rimuovere restano al loro posto.
+    Ritorna (info come write_sidecars, operazioni per publish_staged).
+    """
+    import hashlib
+
+    compressed = compress_sidecars(data) if enabled else {}
+    info, ops = {}, []
+    try:
+        for fmt, sfx in SIDECAR_SUFFIXES.items():
+            sidecar = path.with_name(path.name + sfx)
+            if fmt in compressed:
+                staged = sidecar.with_name(sidecar.name + suffix)
+                write_bytes_atomic(staged, compressed[fmt])
+                ops.append((staged.name, sidecar.name))
+                info[fmt] = {"file": sidecar.name, "bytes": len(compressed[fmt]),
+                             "sha256": hashlib.sha256(compressed[fmt]).hexdigest()}
+            else:
+                ops.append((None, sidecar.name))
+    except BaseException:
+        discard_staged(path.parent, ops)
+        raise
+    return info, ops
+
+
+def publish_staged(output_dir: Path, ops):
+    """
+    Pubblica i file preparati da _convert_file: ogni (nome temporaneo, nome finale)
+    viene rinominato sul nome finale, ogni (None, nome finale) rimosso se esiste.
+    Si chiama per tutte le stagioni subito prima di scrivere seasons.json, così i file
+    pubblicati cambiano insieme al manifest che li descrive.
+    """
+    for staged, final in ops:
+        if staged is None:
+            try:
+                (output_dir / final).unlink()
+            except FileNotFoundError:
+                pass
+        else:
+            replace_durable(output_dir / staged, output_dir / final)
+
+
+def discard_staged(output_dir: Path, ops):
+    """Rimuove i file temporanei di ops non pubblicati (vedi publish_staged)."""
+    for staged, _ in ops:
+        if staged is not None:
+            try:
+                (output_dir / staged).unlink()
+            except OSError:
+                pass
+
+
+def fingerprinted_name(season_key: str, sha256: str):
+    """Nome file con impronta del contenuto: "2023_2024.<primi 8 hex dello SHA-256>.json"."""
+    return f"{season_key}.{sha256[:8]}.json"
+
+
+def is_fingerprinted(name: str, season_key: str):
+    """True se name è un file con impronta della stagione season_key."""
+    return re.fullmatch(re.escape(season_key) + r"\.[0-9a-f]{8}\.json", name) is not None
+
+
+def collect_fingerprint_garbage(output_dir: Path, manifest: dict, keep_generations=3):
+    """
+    Elimina i file con impronta superati: per ogni stagione del manifest tiene il
+    file corrente più le keep_generations - 1 versioni precedenti più recenti
+    (per i client che hanno ancora in cache il vecchio seasons.json), con le
+    rispettive copie .gz/.br. Da chiamare dopo aver scritto il manifest.
+    Ritorna i nomi dei file eliminati.
+    """
+    removed = []
+    for entry in manifest.get("seasons", []):
+        key, current = entry.get("key", ""), entry.get("file", "")
+        old = [p for p in output_dir.glob(f"{key}.*.json")
+               if is_fingerprinted(p.name, key) and p.name != current]
+        old.sort(key=lambda p: p.stat().st_mtime_ns, reverse=True)
+        for p in old[max(0, keep_generations - 1):]:
+            for q in [p] + [p.with_name(p.name + sfx) for sfx in SIDECAR_SUFFIXES.values()]:
+                if q.exists():
+                    q.unlink()
+                    removed.append(q.name)
+    return removed
+
+
+def load_manifest_entries(output_dir: Path):
+    """
+    Voci del seasons.json esistente per key, solo quelle il cui JSON esiste
+    ancora nella cartella di output ({} se il manifest manca o è illeggibile).
+    """
+    entries = {}
+    try:
+        existing = json.loads((output_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+        for s in existing.get("seasons", []):
+            if isinstance(s, dict) and s.get("key") and (output_dir / str(s.get("file", ""))).is_file():
+                entries[s["key"]] = s
+    except Exception:
+        pass  # manifest assente o illeggibile: viene ricostruito con le stagioni correnti
+    return entries
+
+
+def merge_manifest(output_dir: Path, seasons: list):
+    """
+    Unisce le stagioni appena generate al seasons.json esistente:
+    le voci con la stessa "key" vengono sostituite, le altre mantenute purché
+    il loro JSON esista ancora nella cartella di output. Ritorna il manifest ordinato per key.
+    """
+    merged = load_manifest_entries(output_dir)
+    for s in seasons:
+        merged[s["key"]] = s
+    return {"schema_version": 1, "seasons": [merged[k] for k in sorted(merged)]}
+
+
+# Livelli di log, ricavati dal tag a inizio riga ("[WARN] ...", "  [ERRORE] ..."); righe senza tag = INFO
+LOG_LEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERRORE": 40}
+_LOG_TAG_LEVELS = {"DEBUG": "DEBUG", "OK": "INFO", "INFO": "INFO", "FINE": "INFO",
+                   "WARN": "WARN", "STOP": "WARN", "ERRORE": "ERRORE"}
+_LOG_TAG_RE = re.compile(r"\s*\[([A-Z]+)\]")
+
+
+def log_level_of(line: str):
+    """Livello di una riga di log secondo il suo tag ([OK], [WARN], [ERRORE], ...)."""
+    m = _LOG_TAG_RE.match(line)
+    return _LOG_TAG_LEVELS.get(m.group(1), "INFO") if m else "INFO"
+
+
+class LogSink:
+    """
+    Log di una conversione: conversion.log viene aperto una sola volta e scritto
+    con un buffer, svuotato da flush() (dopo ogni file) e da close(), invece di
+    riaprire il file per ogni riga (lento su cartelle di rete).
+    Le righe sotto min_level vengono scartate; quelle tenute vanno anche a on_line.
+    Con json_lines=True scrive in più "conversion.jsonl": un oggetto
+    {"time", "level", "message"} per riga, comodo da filtrare con altri strumenti.
+    Errori di scrittura del log non interrompono mai la conversione.
+    """
+
+    def __init__(self, output_dir: Path, min_level="INFO", json_lines=False, on_line=None):
+        if min_level not in LOG_LEVELS:
+            raise ValueError(f"Livello di log non valido: {min_level} (validi: {', '.join(LOG_LEVELS)})")
+        self.min_level = LOG_LEVELS[min_level]
+        self.on_line = on_line or (lambda line: None)
+        self._files = {}
+        for name, enabled in (("text", True), ("json", json_lines)):
+            if not enabled:
+                continue
+            path = output_dir / ("conversion.log" if name == "text" else "conversion.jsonl")
+            try:
+                self._files[name] = path.open("a", encoding="utf-8", buffering=1 << 16)
+            except OSError:
+                pass
+
+    def __call__(self, *args):
+        line = " ".join(str(a) for a in args)
+        level = log_level_of(line)
+        if LOG_LEVELS[level] < self.min_level:
+            return
+        self.on_line(line)
+        self._write("text", line + "\n")
+        if "json" in self._files:
+            record = {"time": datetime.utcnow().isoformat(timespec="milliseconds") + "Z",
+                      "level": level, "message": line.strip()}
+            self._write("json", json.dumps(record, ensure_ascii=False) + "\n")
+
+    def _write(self, name, text):
+        f = self._files.get(name)
+        if f is None:
+            return
+        try:
+            f.write(text)
+        except OSError:
+            self._files.pop(name, None)
+
+    def flush(self):
+        for name, f in list(self._files.items()):
+            try:
+                f.flush()
+            except OSError:
+                self._files.pop(name, None)
+
+    def close(self):
+        self.flush()
+        for f in self._files.values():
+            try:
+                f.close()
+            except OSError:
+                pass
+        self._files = {}
+
+
+def file_sha256(path: Path, chunk_size=1 << 20):
+    """SHA-256 (hex) del contenuto di un file, letto a blocchi."""
+    import hashlib
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def load_state(output_dir: Path):
+    """Carica lo stato della modalità incrementale (vuoto se assente o illeggibile)."""
+    try:
+        state = json.loads((output_dir / STATE_FILE).read_text(encoding="utf-8"))
+        if isinstance(state.get("files"), dict):
+            return state
+    except Exception:
+        pass
+    return {"state_version": 1, "files": {}}
+
+
+def _unchanged_entry(state: dict, fp: Path, season_key: str, options: dict, output_dir: Path):
+    """
+    Ritorna la voce di stato di fp se il file è invariato rispetto all'ultima
+    conversione (stesse opzioni, stesso convertitore, JSON ancora presente), altrimenti None.
+    Il confronto usa prima dimensione+mtime; l'hash viene calcolato solo se l'mtime è cambiato.
+    """
+    prev = state["files"].get(str(fp.resolve()))
+    if not prev:
+        return None
+    if prev.get("converter_version") != CONVERTER_VERSION or prev.get("options") != options:
+        return None
+    season = prev.get("season") or {}
+    if season.get("key") != season_key or not (output_dir / season.get("file", "")).is_file():
+        return None
+
+    st = fp.stat()
+    if st.st_size != prev.get("size"):
+        return None
+    if st.st_mtime_ns != prev.get("mtime_ns"):
+        if file_sha256(fp) != prev.get("sha256"):
+            return None
+        prev["mtime_ns"] = st.st_mtime_ns  # contenuto identico (es. file ricopiato)
+    return prev
+
+
+def default_cache_dir():
+    """Cartella di default della cache dei fogli: %LOCALAPPDATA% su Windows, altrimenti $XDG_CACHE_HOME o ~/.cache."""
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "FCM_Excel_2_JSON" / "sheets"
+
+
+@lru_cache(maxsize=None)
+def _module_version(module: str):
+    """Versione installata di un modulo (dai metadati del pacchetto), None se non installato."""
+    try:
+        from importlib.metadata import version
+        return version(module)
+    except Exception:
+        pass
+    try:
+        import importlib
+        return getattr(importlib.import_module(module), "__version__", "?")
+    except ImportError:
+        return None
+
+
+def sheet_cache_key(fp: Path, sha256: str, settings: dict, columns):
+    """
+    Chiave della cache per il foglio letto da fp: hash del contenuto del file, motore
+    di conversione (con la versione di pandas), motori Excel candidati con la loro
+    versione e colonne richieste (options["columns"]). Se cambia uno di questi il
+    foglio viene riletto dall'Excel.
+    """
+    import hashlib
+    engines = [[name, _module_version(EXCEL_ENGINES[name]["module"])]
+               for name in engine_candidates(fp, settings["engine"])]
+    parts = {
+        "cache_version": SHEET_CACHE_VERSION,
+        "sheet": SHEET_NAME,
+        "sha256": sha256,
+        "core": settings["core"],
+        "pandas": _module_version("pandas") if settings["core"] == "pandas" else None,
+        "engines": engines,
+        "columns": columns,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_cached_sheet(cache_dir: Path, key: str):
+    """
+    Foglio salvato da store_cached_sheet: (frame, motore usato), None se assente o
+    illeggibile. Aggiorna la data di modifica del file, che prune_sheet_cache usa
+    come ultimo utilizzo.
+    """
+    import pickle
+    path = cache_dir / f"{key}{SHEET_CACHE_SUFFIX}"
+    try:
+        with path.open("rb") as f:
+            entry = pickle.load(f)
+        os.utime(path)
+        return entry["frame"], entry["engine"]
+    except Exception:
+        return None  # assente, rimosso nel frattempo o scritto da una versione incompatibile
+
+
+def store_cached_sheet(cache_dir: Path, key: str, frame, engine_used: str):
+    """
+    Salva il foglio letto (DataFrame o LiteFrame) in cache con pickle: i fogli non
+    normalizzati hanno colonne con tipi misti (testo e numeri) che Parquet/Arrow non
+    conservano così come sono. Scrittura atomica, più worker possono salvare insieme.
+    """
+    import pickle
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{key}{SHEET_CACHE_SUFFIX}"
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp.open("wb") as f:
+            pickle.dump({"frame": frame, "engine": engine_used}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def prune_sheet_cache(cache_dir: Path, max_bytes: int):
+    """
+    Eviction LRU per dimensione: tiene i fogli usati più di recente (data di modifica,
+    aggiornata a ogni lettura) finché stanno in max_bytes e rimuove gli altri.
+    Ritorna (file rimasti, byte rimasti, file rimossi).
+    """
+    entries = []
+    for p in cache_dir.glob(f"*{SHEET_CACHE_SUFFIX}"):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        entries.append((st.st_mtime_ns, st.st_size, p))
+    entries.sort(key=lambda e: e[0], reverse=True)
+    kept = total = removed = 0
+    full = False
+    for _, size, p in entries:
+        full = full or total + size > max_bytes
+        if full:
+            try:
+                p.unlink()
+                removed += 1
+                continue
+            except OSError:
+                pass
+        kept += 1
+        total += size
+    return kept, total, removed
+
+
+def peak_rss_bytes():
+    """
+    Picco di memoria residente (RSS) del processo corrente in byte, o None se
+    non determinabile. Usa resource su Linux/macOS e GetProcessMemoryInfo su Windows.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return int(counters.PeakWorkingSetSize)
+    except Exception:
+        pass
+    return None
+
+
+def _process_pool(workers):
+    """Pool di processi per la conversione parallela, None con un solo processo (import solo se serve)."""
+    if workers <= 1:
+        return None
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def _pool_ready():
+    """Compito vuoto per avviare (o verificare) i processi di un pool."""
+    return os.getpid()
+
+
+def warm_process_pool(workers, core="auto", engine="auto", backend="auto"):
+    """
+    Pool di processi già avviati da passare a process_files / validate_files (pool=):
+    ogni processo importa appena parte i moduli della conversione (vedi
+    prewarm_imports). Con spawn (Windows) ogni processo ripartirebbe altrimenti da
+    zero a ogni conversione, anche con i moduli già caricati nel processo principale.
+    Ritorna quando tutti i processi sono pronti; None con un solo processo.
+    """
+    if workers <= 1:
+        return None
+    from concurrent.futures import ProcessPoolExecutor, wait
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=prewarm_imports,
+                               initargs=(core, engine, backend))
+    # Un compito per processo: nessuno è ancora libero, quindi il pool li avvia tutti
+    wait([pool.submit(_pool_ready) for _ in range(workers)])
+    return pool
+
+
+def pool_alive(pool):
+    """True se il pool risponde (un processo terminato in modo anomalo lo rende inutilizzabile)."""
+    try:
+        pool.submit(_pool_ready).result(timeout=30)
+        return True
+    except Exception:
+        return False
+
+
+def _release_pool(pool, own_pool, futures):
+    """Fine di un lavoro sul pool: chiude il pool proprio, di uno esterno annulla e attende solo i compiti."""
+    if pool is None:
+        return
+    if own_pool:
+        pool.shutdown(wait=True, cancel_futures=True)
+        return
+    from concurrent.futures import wait
+    for fut in futures:
+        fut.cancel()
+    wait(futures)
+
+
+def default_workers():
+    """Numero di processi di default per la conversione parallela (= core disponibili)."""
+    return os.cpu_count() or 1
+
+
+def _convert_file(fp: Path, output_dir: Path, season_label: str, season_key: str,
+                  options: dict, settings: dict, now_iso: str, previous=None):
+    """
+    Elabora un singolo file: lettura → validazione → normalizzazione → scrittura JSON.
+    options contiene le opzioni che cambiano il JSON prodotto (registrate nello stato
+    incrementale), settings quelle che cambiano solo il modo di produrlo (es. motore Excel).
+    previous è la voce attuale della stagione in seasons.json: se i dati non sono
+    cambiati il file esistente non viene toccato, così hash, ETag e "last_changed"
+    restano gli stessi e i client possono non riscaricarlo.
+    Non tocca la GUI (gira anche nei processi worker): ritorna un dict con
+    le righe di log ("lines"), la voce per seasons.json ("season", None se fallito),
+    i file preparati con nomi temporanei da pubblicare prima di seasons.json
+    ("publish", vedi publish_staged),
+    i dati del sorgente per la modalità incrementale ("source") e le statistiche
+    per run_report.json ("stats": secondi per fase di RUN_STAGES, righe, byte letti
+    e scritti, picco RSS del processo, esito della cache dei fogli), presenti anche
+    per i file falliti.
+    Con settings["cache_dir"] il foglio letto viene salvato nella cache dei fogli e
+    ripreso da lì finché Excel, motori e colonne richieste non cambiano (vedi
+    sheet_cache_key): cambiare RAW o formato del JSON non rilegge l'Excel.
+    """
+    lines = []
+    st = fp.stat()
+    stats = {"engine": None, "rows": 0, "bytes_read": st.st_size, "bytes_written": 0,
+             "seconds": dict.fromkeys(RUN_STAGES, 0.0), "peak_rss": None, "cache": None}
+    result = {"lines": lines, "season": None, "source": None, "stats": stats, "publish": []}
+    raw_mode = options["raw"]
+    t_stage = time.perf_counter()
+    if settings["core"] == "lite":
+        import fcm_lite
+        read, normalize, row_chunks = fcm_lite.read_sheet, fcm_lite.normalize, fcm_lite.row_chunks
+    else:
+        read, normalize, row_chunks = read_sheet, normalize_df, frame_row_chunks
+
+    def lap(stage):
+        # Aggiunge a stage il tempo trascorso dall'ultima misura
+        nonlocal t_stage
+        now = time.perf_counter()
+        stats["seconds"][stage] += now - t_stage
+        t_stage = now
+        stats["peak_rss"] = peak_rss_bytes()
+
+    # Cache dei fogli letti: stesso contenuto, motori e colonne -> niente lettura Excel
+    cache_dir = Path(settings["cache_dir"]) if settings.get("cache_dir") else None
+    source_sha256 = None
+    cached = None
+    if cache_dir is not None:
+        source_sha256 = file_sha256(fp)
+        cache_key = sheet_cache_key(fp, source_sha256, settings, options["columns"])
+        cached = load_cached_sheet(cache_dir, cache_key)
+        stats["cache"] = "hit" if cached is not None else "miss"
+
+    if cached is not None:
+        df, engine_used = cached
+        notes = []
+    else:
+        # Proiezione colonne: prima la sola intestazione (errore immediato se mancano
+        # colonne), poi lettura delle sole colonne richieste (+ extra ammessi)
+        usecols = None
+        if options["columns"] is not None:
+            try:
+                header, _, _ = read_header(fp, SHEET_NAME, settings["engine"])
+            except Exception as e:
+                lap("read")
+                lines.append(f"  [ERRORE] Impossibile leggere il foglio '{SHEET_NAME}': {e}")
+                return result
+            lap("read")
+            missing = missing_columns(header)
+            lap("validate")
+            if missing:
+                lines.append(f"  [ERRORE] Colonne mancanti: {missing} -> file saltato")
+                return result
+            wanted = set(options["columns"])
+            usecols = [c for c in header if c in wanted]
+
+        # Lettura Excel
+        try:
+            df, engine_used, notes = read(fp, SHEET_NAME, settings["engine"], usecols=usecols)
+        except Exception as e:
+            lap("read")
+            lines.append(f"  [ERRORE] Impossibile leggere il foglio '{SHEET_NAME}': {e}")
+            return result
+    lap("read")
+    stats["engine"] = engine_used
+    stats["rows"] = int(len(df))
+    for note in notes:
+        lines.append(f"  [WARN] {note}")
+    lines.append(f"  Motore: {engine_used}" + (" (dalla cache)" if cached is not None else ""))
+
+    # Validazione colonne
+    missing = ensure_required_columns(df)
+    lap("validate")
+    if missing:
+        lines.append(f"  [ERRORE] Colonne mancanti: {missing} -> file saltato")
+        return result
+
+    # Salvataggio in cache prima della normalizzazione (che modifica il frame)
+    if cache_dir is not None and cached is None:
+        try:
+            store_cached_sheet(cache_dir, cache_key, df, engine_used)
+        except Exception as e:
+            lines.append(f"  [WARN] Cache fogli non aggiornata: {e}")
+        lap("read")
+
+    # Normalizzazione (se RAW disattivato)
+    if not raw_mode:
+        plan = normalization_plan(tuple(df.columns))
+        kinds = [rule.kind for rule in plan]
+        lines.append("  [DEBUG] Normalizzazione: " + ", ".join(f"{kinds.count(k)} {k}" for k in _RULES if k in kinds))
+        df = normalize(df)
+        if settings.get("compact_dtypes") and settings["core"] == "pandas":
+            before = df.memory_usage(deep=True).sum()
+            df = compact_dtypes(df)
+            lines.append(f"  [DEBUG] Tipi compatti: {before / 2**20:.1f} MB -> "
+                         f"{df.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+    lap("normalize")
+
+    # Mantieni tutte le colonne presenti (ordine del DataFrame)
+    cols = list(df.columns)
+
+    schema_version = options["schema_version"]
+    head = {
+        "schema_version": schema_version,
+        "season_label": season_label,  # es. "2021/2022"
+        "season_key": season_key,      # es. "2021_2022" (safe per filename/URL)
+        "generated_at": now_iso,
+        "columns": cols,
+    }
+
+    # "players" scritto in streaming dagli array di colonna (vedi write_season_json),
+    # su un file temporaneo: sostituisce quello esistente solo se i dati sono cambiati, e
+    # solo a fine conversione, insieme a seasons.json (vedi publish_staged).
+    # Con options["fingerprint"] il nome finale contiene l'hash del contenuto (YYYY_YYYY.<hash8>.json)
+    staged_suffix = f".{os.getpid()}.tmp"
+    out_path = output_dir / f"{season_key}.json"
+    tmp_path = out_path.with_name(out_path.name + staged_suffix)
+    publish = []  # file preparati finora (vedi publish_staged)
+    try:
+        try:
+            written = write_season_json(tmp_path, head, cols, row_chunks(df),
+                                        compact=options["compact"], backend=settings["json_backend"],
+                                        positional=schema_version == 2)
+            prev_file = (previous or {}).get("file", "")
+            unchanged = (
+                previous is not None
+                and is_fingerprinted(prev_file, season_key) == options["fingerprint"]
+                and previous.get("content_sha256") == written["content_sha256"]
+                and (output_dir / prev_file).is_file()
+            )
+            if unchanged:
+                out_path = output_dir / prev_file
+                tmp_path.unlink()
+            else:
+                if options["fingerprint"]:
+                    out_path = output_dir / fingerprinted_name(season_key, written["sha256"])
+                stats["bytes_written"] += written["bytes"]
+            lap("write")
+        except Exception as e:
+            lap("write")
+            lines.append(f"  [ERRORE] Scrittura JSON {out_path.name}: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+            return result
+
+        # Copie .gz/.br preparate anch'esse con nomi temporanei; il JSON si pubblica per
+        # ultimo, come seasons.json dopo le sue copie
+        try:
+            if unchanged and bool(previous.get("compressed")) == options["precompress"]:
+                compressed = previous.get("compressed")
+            else:
+                data = (out_path if unchanged else tmp_path).read_bytes() if options["precompress"] else b""
+                compressed, publish = stage_sidecars(out_path, options["precompress"], data, staged_suffix)
+                stats["bytes_written"] += sum(c["bytes"] for c in compressed.values())
+            lap("compress")
+        except Exception as e:
+            lap("compress")
+            lines.append(f"  [ERRORE] Compressione {out_path.name}: {e}")
+            discard_staged(output_dir, publish + [(tmp_path.name, out_path.name)])
+            return result
+        if not unchanged:
+            publish.append((tmp_path.name, out_path.name))
+        result["publish"] = publish
+
+        if unchanged:
+            file_info = {k: previous[k] for k in ("bytes", "sha256", "etag", "last_changed")}
+        else:
+            file_info = {
+                "bytes": written["bytes"],
+                "sha256": written["sha256"],
+                "etag": f'"{written["sha256"][:16]}"',
+                "last_changed": now_iso,
+            }
+
+        result["season"] = {
+            "label": season_label,
+            "key": season_key,
+            "file": out_path.name,
+            "schema_version": schema_version,
+            "n_players": int(len(df)),
+            "last_updated": now_iso,
+            **file_info,
+            "content_sha256": written["content_sha256"],
+        }
+        if compressed:
+            result["season"]["compressed"] = compressed
+        result["source"] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                            "sha256": source_sha256 or file_sha256(fp)}
+        lap("hash")
+        if unchanged:
+            lines.append(f"  [OK] Dati invariati, {out_path.name} non modificato ({len(df)} righe)")
+        else:
+            lines.append(f"  [OK] Generato {out_path.name} ({len(df)} righe)")
+        return result
+    except BaseException:
+        # Interruzione o errore imprevisto dopo la preparazione: i file temporanei non
+        # arriverebbero più a publish_staged
+        discard_staged(output_dir, publish + [(tmp_path.name, None)])
+        raise
+
+
+def collect_input_files(inputs):
+    """
+    Espande una lista di percorsi (file e/o cartelle) nei file .xls/.xlsx da convertire.
+    Le cartelle vengono lette senza ricorsione.
+    """
+    files = []
+    for p in inputs:
+        p = Path(p)
+        if p.is_dir():
+            files.extend(q for q in p.glob("*.xls*") if q.is_file())
+        else:
+            files.append(p)
+    return sorted(files, key=lambda p: p.name.lower())
+
+
+def _check_file(fp: Path, engine: str):
+    """
+    Verifica veloce di un file senza convertirlo: stagione nel nome, presenza del
+    foglio SHEET_NAME e colonne obbligatorie, leggendo solo l'intestazione.
+    Gira anche nei processi worker; ritorna un dict con "errors" e "lines" di log.
+    """
+    t0 = time.perf_counter()
+    result = {"file": fp.name, "season_key": None, "errors": [], "lines": []}
+    try:
+        result["season_key"] = extract_season_from_filename(fp.stem)[1]
+    except Exception as e:
+        result["errors"].append(str(e))
+    try:
+        header, engine_used, _ = read_header(fp, SHEET_NAME, engine)
+    except Exception as e:
+        result["errors"].append(f"Impossibile leggere il foglio '{SHEET_NAME}': {e}")
+    else:
+        missing = missing_columns(header)
+        if missing:
+            result["errors"].append(f"Colonne mancanti: {missing}")
+        else:
+            result["lines"].append(f"{len(header)} colonne, motore {engine_used}")
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+
+def validate_files(files, workers=None, engine="auto", cancel_event=None, pool=None,
+                   on_log=None, on_progress=None):
+    """
+    Modalità "solo verifica" (dry run): per ogni file legge solo l'elenco dei fogli
+    e la riga di intestazione (in parallelo con workers > 1), controlla SHEET_NAME,
+    REQUIRED_COLUMNS, il pattern della stagione nel nome e le stagioni duplicate.
+    Se cancel_event (threading.Event) viene impostato, i file non ancora verificati
+    vengono saltati. pool: pool già avviato da usare (vedi warm_process_pool), che
+    resta aperto. Non scrive nulla.
+    Ritorna {"ok": n, "errors": n, "files": [risultati per file], "cancelled": bool}.
+    """
+    on_log = on_log or (lambda line: None)
+    on_progress = on_progress or (lambda done, total: None)
+
+    files = [Path(p) for p in files]
+    files = [p for p in files if p.is_file() and p.suffix.lower() in (".xls", ".xlsx")]
+    files = sorted(files, key=lambda p: p.name.lower())
+    report = {"ok": 0, "errors": 0, "files": [], "cancelled": False}
+    if not files:
+        on_log("[INFO] Nessun file .xls/.xlsx valido selezionato.")
+        return report
+
+    # Stagioni duplicate (dal solo nome file, nel processo principale)
+    by_season = {}
+    for fp in files:
+        try:
+            by_season.setdefault(extract_season_from_filename(fp.stem)[1], []).append(fp.name)
+        except ValueError:
+            pass
+
+    on_progress(0, len(files))
+    workers = max(1, min(int(workers or default_workers()), len(files)))
+    own_pool = pool is None
+    if own_pool:
+        pool = _process_pool(workers)
+    futures = []
+    try:
+        if pool is not None:
+            futures = [pool.submit(_check_file, fp, engine) for fp in files]
+            results = (fut.result() for fut in futures)
+        else:
+            results = (_check_file(fp, engine) for fp in files)
+
+        for i, res in enumerate(results, start=1):
+            if cancel_event is not None and cancel_event.is_set():
+                report["cancelled"] = True
+                on_log(f"[STOP] Verifica interrotta: {len(files) - i + 1} file non verificati.")
+                break
+            others = [n for n in by_season.get(res["season_key"], ()) if n != res["file"]]
+            if others:
+                res["errors"].append(f"Stagione duplicata '{res['season_key']}' (anche in: {', '.join(others)})")
+
+            on_log(f"Verifico: {res['file']}")
+            for err in res["errors"]:
+                on_log(f"  [ERRORE] {err}")
+            if not res["errors"]:
+                on_log(f"  [OK] {res['season_key']}: {'; '.join(res['lines'])} ({res['seconds']:.2f}s)")
+                report["ok"] += 1
+            else:
+                report["errors"] += 1
+            report["files"].append(res)
+            on_progress(i, len(files))
+    finally:
+        _release_pool(pool, own_pool, futures)
+
+    on_log(f"[FINE] Verificati {len(report['files'])} file: {report['ok']} ok, {report['errors']} con errori")
+    return report
+
+
+def run_report(file_reports, options, settings, workers, now_iso, wall_seconds):
+    """
+    Report della conversione (contenuto di RUN_REPORT_FILE): per ogni file esito,
+    motore, righe, byte letti/scritti, secondi per fase (RUN_STAGES) e picco RSS del
+    processo che l'ha convertito (worker compreso: è il picco del processo fino a
+    quel file), più i totali. "wall_seconds" è il tempo reale dell'intera
+    conversione: con più processi è minore della somma delle fasi.
+    """
+    peaks = [r["peak_rss"] for r in file_reports if r.get("peak_rss")]
+    main_peak = peak_rss_bytes()
+    if main_peak:
+        peaks.append(main_peak)
+    totals = {
+        "files": len(file_reports),
+        "rows": sum(r.get("rows", 0) for r in file_reports),
+        "bytes_read": sum(r.get("bytes_read", 0) for r in file_reports),
+        "bytes_written": sum(r.get("bytes_written", 0) for r in file_reports),
+        "seconds": {stage: round(sum(r.get("seconds", {}).get(stage, 0.0) for r in file_reports), 4)
+                    for stage in RUN_STAGES},
+    }
+    files = []
+    for r in file_reports:
+        r = dict(r)
+        if "seconds" in r:
+            r["seconds"] = {k: round(v, 4) for k, v in r["seconds"].items()}
+        files.append(r)
+    return {
+        "generated_at": now_iso,
+        "converter_version": CONVERTER_VERSION,
+        "options": options,
+        "settings": settings,
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 4),
+        "peak_rss_bytes": max(peaks) if peaks else None,
+        "totals": totals,
+        "files": files,
+    }
+
+
+def format_run_report(report):
+    """Righe di log con la tabella dei tempi per fase di run_report (una riga per file convertito)."""
+    mb = 2 ** 20
+    labels = ("lettura", "verifica", "normal.", "scrittura", "compr.", "hash")
+    lines = ["[INFO] Tempi per fase (secondi):",
+             f"  {'stagione':<11}{'righe':>7}" + "".join(f"{h:>10}" for h in labels)
+             + f"{'MB letti':>10}{'MB scritti':>11}{'RSS MB':>8}"]
+    rows = [r for r in report["files"] if "seconds" in r] + [dict(report["totals"], season="TOTALE")]
+    for r in rows:
+        peak = r.get("peak_rss") if r["season"] != "TOTALE" else report["peak_rss_bytes"]
+        lines.append(
+            f"  {r['season'] or '-':<11}{r['rows']:>7}"
+            + "".join(f"{r['seconds'][stage]:>10.3f}" for stage in RUN_STAGES)
+            + f"{r['bytes_read'] / mb:>10.2f}{r['bytes_written'] / mb:>11.2f}"
+            + (f"{peak / mb:>8.0f}" if peak else f"{'n/d':>8}")
+        )
+    lines.append(f"[INFO] Tempo totale {report['wall_seconds']:.2f}s, processi: {report['workers']} "
+                 f"(report in {RUN_REPORT_FILE})")
+    return lines
+
+
+def process_files(files, output_dir: Path, raw_mode=False, workers=None, cancel_event=None,
+                  incremental=False, engine="auto", only_required=False, extra_columns=(),
+                  compact=False, json_backend="auto", schema_version=1, precompress=False,
+                  fingerprint=False, keep_generations=3, compact_dtypes=False, core="auto",
+                  cache_dir=None, cache_max_mb=DEFAULT_CACHE_MB, log_level="INFO", log_json=False,
+                  pool=None, on_log=None, on_progress=None, on_file_status=None):
+    """
+    Core: converte i file Excel passati (in parallelo con workers > 1, o sul pool già
+    avviato di warm_process_pool) e aggiorna seasons.json una volta alla fine;
+    cancel_event (threading.Event) annulla i file non ancora avviati.
+    Le opzioni sono descritte nelle funzioni a cui rimandano (dumps_json,
+    write_sidecars, fingerprinted_name, compact_dtypes, sheet_cache_key, LogSink, ...).
+    Eventi tramite callback, senza dipendere dall'interfaccia:
+      - on_log(line)                  riga di log (già scritta anche in conversion.log)
+      - on_progress(done, total)      avanzamento (file completati / totali)
+      - on_file_status(name, status)  esito per file: "ok" | "errore" | "saltato" | "invariato"
+    Ritorna {"ok": n, "unchanged": n, "errors": n, "skipped": n, "cancelled": bool}.
+    """
+    on_log = on_log or (lambda line: None)
+    on_progress = on_progress or (lambda done, total: None)
+    on_file_status = on_file_status or (lambda name, status: None)
+    summary = {"ok": 0, "unchanged": 0, "errors": 0, "skipped": 0, "cancelled": False}
+    options = {
+        "raw": bool(raw_mode),
+        "columns": projected_columns(extra_columns) if only_required else None,
+        "compact": bool(compact),
+        "schema_version": int(schema_version),
+        "precompress": bool(precompress),
+        "fingerprint": bool(fingerprint),
+    }
+    if options["schema_version"] not in SCHEMA_VERSIONS:
+        raise ValueError(f"schema_version non supportata: {schema_version} (valide: {SCHEMA_VERSIONS})")
+    settings = {"engine": engine, "json_backend": json_backend, "compact_dtypes": bool(compact_dtypes),
+                "core": conversion_core(core), "cache_dir": str(cache_dir) if cache_dir else None,
+                "cache_max_mb": cache_max_mb}
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    t_start = time.perf_counter()
+    now_iso = datetime.utcnow().isoformat(timespec="seconds") + "Z"
+
+    # Filtra solo .xls/.xlsx esistenti
+    files = [Path(p) for p in files]
+    files = [p for p in files if p.is_file() and p.suffix.lower() in (".xls", ".xlsx")]
+    files = sorted(files, key=lambda p: p.name.lower())
+
+    log = LogSink(output_dir, min_level=log_level, json_lines=log_json, on_line=on_log)
+    try:
+        return _process_plan(files, output_dir, options, settings, now_iso, t_start, summary, incremental,
+                             workers, keep_generations, cancel_event, pool, log, on_progress, on_file_status)
+    finally:
+        log.close()
+
+
+def _process_plan(files, output_dir, options, settings, now_iso, t_start, summary, incremental,
+                  workers, keep_generations, cancel_event, pool, log, on_progress, on_file_status):
+    """Corpo di process_files: log è il LogSink della conversione (svuotato dopo ogni file)."""
+    # Serializzatore effettivo ("auto" risolto): cambia il formato di alcuni float
+    # (vedi dumps_json), quindi fa parte delle opzioni della modalità incrementale
+    settings["json_backend"] = json_backend(settings["json_backend"])
+    options["json_backend"] = settings["json_backend"]
+    seasons = []
+    staged = []        # (file Excel, stagione, operazioni di publish_staged) dei file convertiti
+    file_reports = []  # una voce per file in ordine di nome, per run_report.json
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    if not files:
+        log("[INFO] Nessun file .xls/.xlsx valido selezionato.")
+        return summary
+
+    on_progress(0, len(files))
+
+    # Estrazione stagione da filename (veloce, nel processo principale).
+    # In caso di stagione duplicata vince l'ultimo file in ordine di nome:
+    # i precedenti non vengono convertiti, così due worker non scrivono lo stesso JSON.
+    plan = []  # (fp, season_label, season_key, righe di log preliminari)
+    last_for_season = {}
+    for fp in files:
+        try:
+            season_label, season_key = extract_season_from_filename(fp.stem)
+        except Exception as e:
+            plan.append((fp, None, None, [f"  [WARN] {e} -> file saltato"]))
+            continue
+        pre = []
+        if season_key in last_for_season:
+            pre.append(f"  [WARN] Stagione duplicata '{season_key}' (verrà sovrascritta con questo file).")
+        last_for_season[season_key] = fp
+        plan.append((fp, season_label, season_key, pre))
+
+    jobs = []
+    for idx, (fp, season_label, season_key, pre) in enumerate(plan):
+        if season_key is not None and last_for_season[season_key] != fp:
+            pre.append(f"  [WARN] Stagione '{season_key}' presente anche in un file successivo -> file saltato")
+            plan[idx] = (fp, None, None, pre)
+        elif season_key is not None:
+            jobs.append(idx)
+
+    # Voci attuali di seasons.json: servono ai worker per riconoscere i dati invariati
+    previous = load_manifest_entries(output_dir)
+
+    # Modalità incrementale: i file invariati non vengono inviati ai worker
+    state = load_state(output_dir)
+    unchanged = {}
+    if incremental:
+        for idx in jobs:
+            fp, _, season_key, _ = plan[idx]
+            try:
+                prev = _unchanged_entry(state, fp, season_key, options, output_dir)
+            except OSError:
+                prev = None
+            if prev is not None:
+                unchanged[idx] = prev
+        jobs = [idx for idx in jobs if idx not in unchanged]
+
+    workers = max(1, min(int(workers or default_workers()), len(jobs) or 1))
+    log(f"[DEBUG] {len(jobs)} file da convertire ({len(unchanged)} invariati), processi: {workers}, "
+        f"motore: {settings['engine']}, conversione: {settings['core']}, JSON: {settings['json_backend']}")
+    own_pool = pool is None
+    if own_pool:
+        pool = _process_pool(workers)
+    futures = {}  # compiti del pool non ancora raccolti
+    try:
+        if pool is not None:
+            for idx in jobs:
+                fp, season_label, season_key, _ = plan[idx]
+                futures[idx] = pool.submit(_convert_file, fp, output_dir, season_label,
+                                           season_key, options, settings, now_iso,
+                                           previous.get(season_key))
+
+        stopped = False
+        not_processed = 0
+        for i, (fp, season_label, season_key, pre) in enumerate(plan, start=1):
+            if not stopped and cancelled():
+                stopped = True
+                for fut in futures.values():
+                    fut.cancel()
+            if stopped:
+                # Dopo lo Stop si raccolgono solo i file già in lavorazione nei worker
+                fut = futures.get(i - 1)
+                if fut is None or fut.cancelled():
+                    not_processed += 1
+                    continue
+
+            log(f"Leggo: {fp.name}")
+            for line in pre:
+                log(line)
+            if season_key is None:
+                summary["skipped"] += 1
+                file_reports.append({"file": fp.name, "season": None, "status": "saltato"})
+                log.flush()
+                on_progress(i, len(plan))
+                on_file_status(fp.name, "saltato")
+                continue
+
+            if i - 1 in unchanged:
+                season = unchanged[i - 1]["season"]
+                seasons.append(season)
+                summary["unchanged"] += 1
+                log(f"  [OK] Invariato, {season['file']} non riscritto")
+                file_reports.append({"file": fp.name, "season": season_key, "status": "invariato"})
+                log.flush()
+                on_progress(i, len(plan))
+                on_file_status(fp.name, "invariato")
+                continue
+
+            # Un errore imprevisto (nel worker o qui) fa fallire solo questo file
+            try:
+                if pool is not None:
+                    res = futures.pop(i - 1).result()
+                else:
+                    res = _convert_file(fp, output_dir, season_label, season_key, options, settings,
+                                        now_iso, previous.get(season_key))
+            except Exception as e:
+                res = {"lines": [f"  [ERRORE] Conversione fallita: {e}"], "season": None, "stats": None}
+            if res["season"] is not None:
+                staged.append((fp, season_key, res["publish"]))
+
+            for line in res["lines"]:
+                log(line)
+            if res["season"] is not None:
+                seasons.append(res["season"])
+                summary["ok"] += 1
+                state["files"][str(fp.resolve())] = dict(
+                    res["source"], converter_version=CONVERTER_VERSION,
+                    options=options, season=res["season"],
+                )
+            else:
+                summary["errors"] += 1
+            file_reports.append({"file": fp.name, "season": season_key,
+                                 "status": "ok" if res["season"] is not None else "errore",
+                                 **(res["stats"] or {})})
+            log.flush()
+            on_progress(i, len(plan))
+            on_file_status(fp.name, "ok" if res["season"] is not None else "errore")
+
+        if stopped:
+            summary["cancelled"] = True
+            log(f"[STOP] Conversione interrotta: {not_processed} file non elaborati.")
+
+        if settings["cache_dir"]:
+            hits = sum(r.get("cache") == "hit" for r in file_reports)
+            misses = sum(r.get("cache") == "miss" for r in file_reports)
+            try:
+                kept, size, removed = prune_sheet_cache(Path(settings["cache_dir"]),
+                                                        int(settings["cache_max_mb"] * 2 ** 20))
+                log(f"[INFO] Cache fogli: {hits} letti dalla cache, {misses} letti dall'Excel; "
+                    f"{kept} fogli, {size / 2**20:.1f} MB" + (f" ({removed} rimossi)" if removed else "")
+                    + f" in {settings['cache_dir']}")
+            except Exception as e:
+                log(f"[WARN] Pulizia cache fogli: {e}")
+
+        if file_reports:
+            report = run_report(file_reports, options, settings, workers, now_iso,
+                                time.perf_counter() - t_start)
+            for line in format_run_report(report):
+                log(line)
+            try:
+                write_json(output_dir / RUN_REPORT_FILE, report)
+            except Exception as e:
+                log(f"[WARN] Scrittura {RUN_REPORT_FILE}: {e}")
+
+        # Pubblica insieme i JSON di stagione (e le loro copie .gz/.br) preparati con nomi
+        # temporanei, subito prima del manifest: fino a qui la cartella di output serviva
+        # ancora la generazione precedente, coerente con il seasons.json precedente
+        while staged:
+            fp, season_key, ops = staged[0]
+            try:
+                publish_staged(output_dir, ops)
+            except Exception as e:
+                log(f"[ERRORE] Pubblicazione {season_key}: {e}")
+                discard_staged(output_dir, ops)
+                seasons = [s for s in seasons if s["key"] != season_key]
+                state["files"].pop(str(fp.resolve()), None)
+                summary["ok"] -= 1
+                summary["errors"] += 1
+            del staged[0]
+    finally:
+        _release_pool(pool, own_pool, list(futures.values()))
+        # Un'eccezione che esce da qui (anche KeyboardInterrupt) non deve lasciare nella
+        # cartella di output i file temporanei dei file convertiti ma non pubblicati
+        for _, _, ops in staged:
+            discard_staged(output_dir, ops)
+        for fut in futures.values():
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                discard_staged(output_dir, fut.result()["publish"])
+
+    # Aggiorna manifest (unito a quello esistente). Va scritto per ultimo: i file di
+    # stagione a cui punta sono già al loro posto, e le sue copie .gz/.br lo precedono,
+    # così chi legge seasons.json vede sempre una generazione completa
+    if seasons:
+        manifest = merge_manifest(output_dir, seasons)
+        n_new = len({s["key"] for s in seasons})
+        try:
+            manifest_path = output_dir / MANIFEST_FILE
+            blob = dumps_json(manifest, compact=options["compact"], backend=settings["json_backend"])
+            write_sidecars(manifest_path, options["precompress"], data=blob)
+            write_bytes_atomic(manifest_path, blob)
+            if options["fingerprint"]:
+                removed = collect_fingerprint_garbage(output_dir, manifest, keep_generations)
+                if removed:
+                    log(f"[OK] Rimossi {len(removed)} file con impronta superati")
+            log(f"[OK] Aggiornato {MANIFEST_FILE} ({len(manifest['seasons'])} stagioni, "
+                f"{n_new} da questa conversione)")
+        except Exception as e:
+            log(f"[ERRORE] Scrittura {MANIFEST_FILE}: {e}")
+    else:
+        log("[FINE] Nessun JSON generato (nessun file valido).")
+
+    # Stato incrementale dopo il manifest: se la conversione si interrompe prima, i file
+    # non ancora pubblicati vengono riconvertiti alla prossima
+    if summary["ok"] or unchanged:
+        try:
+            write_json(output_dir / STATE_FILE, state)
+        except Exception as e:
+            log(f"[WARN] Scrittura {STATE_FILE}: {e}")
+
+    return summary
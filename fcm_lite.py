@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+Motore di conversione "lite": stessa lettura, validazione, normalizzazione e
+JSON di fcm_core, ma in Python puro sulle righe lette da calamine/openpyxl/xlrd,
+senza importare pandas né NumPy. Avvio più rapido, meno memoria per processo e
+un eseguibile molto più piccolo (vedi "build_windows.bat lite").
+
+Riproduce le regole di pandas.read_excel + fcm_core.normalize_df:
+- intestazione: celle vuote -> "Unnamed: i", nomi ripetuti -> "X.1", "X.2", ...
+- tipo di ogni colonna come l'inferenza del parser di pandas: interi, float
+  (anche con celle vuote -> NaN), booleani, altrimenti valori misti con i
+  mancanti ("", "NA", "n/a", ... vedi NA_STRINGS) -> NaN
+- normalizzazione secondo fcm_core.normalization_plan, con lo stesso risultato
+  (valori e tipo) delle funzioni clean_*_column
+L'equivalenza con il motore pandas si verifica con benchmarks/check_lite_equivalence.py.
+"""
+
+import math
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from fcm_core import _FLOAT_TRANSLATION, _with_engines, normalization_plan
+
+NAN = float("nan")
+INT64_MIN, INT64_MAX, UINT64_MAX = -2 ** 63, 2 ** 63 - 1, 2 ** 64 - 1
+
+# Testi letti come valore mancante dal parser di pandas (pandas._libs.parsers.STR_NA_VALUES)
+NA_STRINGS = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+})
+TRUE_STRINGS = frozenset({"True", "TRUE", "true"})
+FALSE_STRINGS = frozenset({"False", "FALSE", "false"})
+
+# Numero scritto come testo, come lo accetta pandas: spazi ASCII attorno, segno,
+# decimali con il punto, esponente facoltativo
+_NUMBER_RE = re.compile(r"[ \t\n\v\f\r]*([+-]?)([0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE]([+-]?[0-9]{1,17}))?[ \t\n\v\f\r]*")
+_INF_STRINGS = {"inf": math.inf, "+inf": math.inf, "-inf": -math.inf,
+                "infinity": math.inf, "+infinity": math.inf, "-infinity": -math.inf}
+_POW10 = [float(f"1e{k}") for k in range(309)]
+# Cifre significative considerate da precise_xstrtod di pandas (le altre sono scartate)
+_MAX_DIGITS = 17
+
+
+class LiteFrame:
+    """Foglio letto dal motore lite: nomi di colonna, valori per colonna e tipo di ogni colonna."""
+
+    __slots__ = ("columns", "data", "kinds", "nrows")
+
+    def __init__(self, columns, data, kinds, nrows):
+        self.columns = columns  # nomi, nell'ordine del foglio
+        self.data = data        # una lista di valori Python per colonna
+        self.kinds = kinds      # "int" | "float" | "bool" | "object", come il dtype di pandas
+        self.nrows = nrows
+
+    def __len__(self):
+        return self.nrows
+
+
+def _precise_xstrtod(sign: str, mantissa: str, exponent: int):
+    """
+    Valore float di un numero in testo calcolato come precise_xstrtod di pandas:
+    al massimo _MAX_DIGITS cifre, poi una sola moltiplicazione/divisione per 10**k.
+    Coincide con float() tranne che per i numeri con più di 15-17 cifre. None se fuori scala.
+    """
+    intpart, _, frac = mantissa.partition(".")
+    number, digits = 0.0, 0
+    for ch in intpart:
+        if digits < _MAX_DIGITS:
+            number = number * 10.0 + (ord(ch) - 48)
+            digits += 1
+        else:
+            exponent += 1
+    for ch in frac[:max(0, _MAX_DIGITS - digits)]:
+        number = number * 10.0 + (ord(ch) - 48)
+        exponent -= 1
+    if sign == "-":
+        number = -number
+    if exponent > 308:
+        return None
+    if exponent > 0:
+        number *= _POW10[exponent]
+    elif exponent < -616:
+        number = 0.0
+    elif exponent < -308:
+        number = number / _POW10[-308 - exponent] / _POW10[308]
+    else:
+        number /= _POW10[-exponent]
+    return None if math.isinf(number) else number
+
+
+@lru_cache(maxsize=8192)
+def parse_number(text: str):
+    """
+    Testo -> numero con le regole del parser di pandas: (valore, valore come float),
+    dove valore è int se il testo non ha punto né esponente, altrimenti float
+    ("inf"/"infinity" compresi); None se non è un numero.
+    """
+    m = _NUMBER_RE.fullmatch(text)
+    if m is None:
+        inf = _INF_STRINGS.get(text.lower())
+        return None if inf is None else (inf, inf)
+    sign, mantissa, exponent = m.groups()
+    value = _precise_xstrtod(sign, mantissa, int(exponent or 0))
+    if value is None:
+        return None
+    if exponent is None and "." not in mantissa:
+        return int(sign + mantissa), value
+    return value, value
+
+
+def _as_int64(v):
+    """v come intero a 64 bit se è un numero intero (bool e float senza decimali compresi), altrimenti None."""
+    if isinstance(v, float):
+        if not v.is_integer():
+            return None
+        v = int(v)
+    elif not isinstance(v, int):
+        return None
+    return v if INT64_MIN <= v <= INT64_MAX else None
+
+
+def to_numeric(values, na_strings=NA_STRINGS, coerce=False):
+    """
+    Conversione numerica di una colonna come pandas (lib.maybe_convert_numeric).
+    Ritorna (valori, tipo) con tipo "int" | "float" | "bool", oppure (valori originali,
+    "object") se i tipi sono incompatibili (es. booleani e numeri); None se c'è un
+    valore non numerico. Con coerce=True i valori non numerici diventano NaN.
+    """
+    # Come pandas: se il primo valore è un intero e tutti i valori sono interi
+    # (anche booleani o float senza decimali), la colonna è intera
+    if values and type(values[0]) is int and all(_as_int64(v) is not None for v in values):
+        return [int(v) for v in values], "int"
+    out, floats = [], []  # valori (int se interi) e gli stessi come float
+    saw_null = saw_float = saw_neg = saw_uint = False
+    n_bool = 0
+    for v in values:
+        if v is None or (isinstance(v, str) and v in na_strings):
+            saw_null = True
+            out.append(NAN)
+            floats.append(NAN)
+            continue
+        if isinstance(v, str):
+            parsed = parse_number(v) if v else None
+            if parsed is None or (isinstance(parsed[0], int) and not INT64_MIN <= parsed[0] <= UINT64_MAX):
+                if not coerce:
+                    return None
+                saw_null = parsed is None
+                parsed = (NAN, NAN) if parsed is None else (parsed[1], parsed[1])
+            v, fv = parsed
+        elif isinstance(v, (int, float)):
+            n_bool += isinstance(v, bool)
+            fv = float(v)
+        else:
+            if not coerce:
+                return None
+            v = fv = NAN
+        if isinstance(v, float):
+            if v != v:
+                saw_null = True
+            saw_float = True
+        elif v < 0:
+            if v < INT64_MIN:
+                saw_float = True
+            else:
+                saw_neg = True
+        elif v > INT64_MAX:
+            if v > UINT64_MAX:
+                saw_float = True
+            else:
+                saw_uint = True
+        out.append(v)
+        floats.append(fv)
+
+    if saw_uint and (saw_null or saw_neg):
+        # Interi oltre INT64_MAX con negativi o mancanti: pandas non sceglie un tipo intero
+        if not coerce:
+            return list(values), "object"
+        saw_float = True
+    if out and n_bool == len(out):
+        return out, "bool"
+    if saw_float or saw_null:
+        return floats, "float"
+    return [int(v) for v in out], "int"
+
+
+def convert_bool(values):
+    """Booleani e testi "True"/"false"/... -> bool, come pandas (libops.maybe_convert_bool)."""
+    out = []
+    has_na = False
+    for v in values:
+        if isinstance(v, bool):
+            out.append(v)
+        elif v in TRUE_STRINGS:
+            out.append(True)
+        elif v in FALSE_STRINGS:
+            out.append(False)
+        elif v is None or (isinstance(v, float) and v != v):
+            out.append(NAN)
+            has_na = True
+        else:
+            return values, "object"
+    return out, "object" if has_na else "bool"
+
+
+def infer_column(values):
+    """Tipo e valori di una colonna letta dal foglio, come li ricava il parser di pandas."""
+    converted = to_numeric(values)
+    if converted is None:
+        # Mancanti -> NaN; valori uguali (es. 0 e False) diventano lo stesso oggetto, come in pandas
+        memo = {}
+        values = [NAN if isinstance(v, str) and v in NA_STRINGS else memo.setdefault(v, v) for v in values]
+    elif converted[1] != "object":
+        return converted
+    else:
+        values = converted[0]
+    return convert_bool(values)
+
+
+def _dedup_names(names):
+    """Nomi ripetuti -> "X.1", "X.2", ... (prima i nomi veri, poi gli "Unnamed"), come pandas."""
+    unnamed = [i for i, c in enumerate(names) if c == ""]
+    names = [f"Unnamed: {i}" if c == "" else c for i, c in enumerate(names)]
+    counts = {}
+    for i in [i for i in range(len(names)) if i not in unnamed] + unnamed:
+        col = old = names[i]
+        cur = counts.get(col, 0)
+        while cur > 0:
+            counts[old] = cur + 1
+            col = f"{old}.{cur}"
+            if col in names:
+                cur += 1
+            else:
+                cur = counts.get(col, 0)
+        names[i] = col
+        counts[col] = cur + 1
+    return names
+
+
+def frame_from_rows(rows, usecols=None):
+    """LiteFrame dalle righe del foglio (la prima è l'intestazione); usecols come in read_sheet."""
+    if not rows:
+        return LiteFrame([], [], [], 0)
+    columns = _dedup_names(list(rows[0]))
+    keep = range(len(columns))
+    if usecols is not None:
+        wanted = set(usecols)
+        keep = [j for j, c in enumerate(columns) if c in wanted]
+    body = rows[1:]
+    columns = [columns[j] for j in keep]
+    data, kinds = [], []
+    for j in keep:
+        values, kind = infer_column([row[j] if j < len(row) else None for row in body])
+        data.append(values)
+        kinds.append(kind)
+    return LiteFrame(columns, data, kinds, len(body))
+
+
+def read_sheet(fp: Path, sheet_name: str, engine="auto", usecols=None):
+    """
+    Come fcm_core.read_sheet, ma senza pandas: ritorna (LiteFrame, motore usato,
+    note sui fallback). Stessi motori e stesso ordine di tentativi (vedi EXCEL_ENGINES).
+    """
+    rows, engine_used, notes = _with_engines(fp, engine, "rows", sheet_name, usecols=usecols)
+    # openpyxl scarta le colonne già durante la lettura, come read_xlsx_streaming; con
+    # gli altri motori la proiezione segue i nomi finali, come pd.read_excel(usecols=...)
+    return frame_from_rows(rows, None if engine_used == "openpyxl" else usecols), engine_used, notes
+
+
+def _round(x: float, decimals: int):
+    """Arrotondamento come NumPy (x * 10**decimals, pari più vicino, / 10**decimals)."""
+    scale = 10.0 ** decimals
+    y = x * scale
+    if not math.isfinite(y):
+        return y / scale
+    return math.copysign(round(y), y) / scale
+
+
+def clean_float_values(values, kind, decimals=2):
+    """Come fcm_core.clean_float_column: ritorna (valori, tipo)."""
+    if values and kind == "float":
+        a = [abs(v) for v in values]
+        if not any(0 < x < 1e-4 for x in a):
+            return [_round(x, decimals) for x in a], "float"
+    elif values and kind == "int" and min(values) > INT64_MIN:
+        return [abs(v) for v in values], "int"
+    cleaned = {}
+    texts = []
+    for v in values:
+        t = str(v)
+        c = cleaned.get(t)
+        if c is None:
+            c = cleaned[t] = t.strip().translate(_FLOAT_TRANSLATION)
+        texts.append(c)
+    values, kind = to_numeric(texts, na_strings=(), coerce=True)
+    if kind == "float":
+        values = [_round(x, decimals) for x in values]
+    return values, kind
+
+
+def clean_int_values(values, kind):
+    """Come fcm_core.clean_int_column: coerzione numerica (solo per testo/misti), NaN -> 0, interi."""
+    if kind == "object":
+        values, kind = to_numeric(values, na_strings=(), coerce=True)
+    return [0 if v != v else _astype_int64(v) for v in values], "int"
+
+
+def _astype_int64(v):
+    """int(v) come astype(int) di NumPy: fuori dall'intervallo a 64 bit dà INT64_MIN (o riparte da lì)."""
+    if isinstance(v, float) and math.isinf(v):
+        raise ValueError("Cannot convert non-finite values (NA or inf) to integer")
+    n = int(v)
+    if INT64_MIN <= n <= INT64_MAX:
+        return n
+    return n - 2 ** 64 if isinstance(v, int) and n <= UINT64_MAX else INT64_MIN
+
+
+def clean_str_values(values, kind):
+    """Come fcm_core.clean_str_column: testo senza spazi iniziali/finali."""
+    return [str(v).strip() for v in values], "object"
+
+
+_CLEANERS = {
+    "str": lambda values, kind, rule: clean_str_values(values, kind),
+    "float": lambda values, kind, rule: clean_float_values(values, kind, rule.decimals),
+    "int": lambda values, kind, rule: clean_int_values(values, kind),
+}
+
+
+def normalize(frame: LiteFrame):
+    """Come fcm_core.normalize_df, su un LiteFrame (una passata secondo normalization_plan)."""
+    for j, rule in enumerate(normalization_plan(tuple(frame.columns))):
+        if rule.kind != "keep":
+            frame.data[j], frame.kinds[j] = _CLEANERS[rule.kind](frame.data[j], frame.kinds[j], rule)
+    return frame
+
+
+def row_chunks(frame: LiteFrame, chunk_rows=2000):
+    """Come fcm_core.frame_row_chunks: righe a blocchi di chunk_rows (liste di tuple)."""
+    for start in range(0, frame.nrows, chunk_rows):
+        yield list(zip(*(col[start:start + chunk_rows] for col in frame.data)))
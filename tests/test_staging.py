@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+File temporanei di _convert_file / publish_staged: una conversione interrotta a metà
+(KeyboardInterrupt o errore imprevisto) non deve lasciare "*.tmp" nella cartella di output.
+
+Uso:  python -m unittest discover tests
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import fcm_core  # noqa: E402
+
+
+def season_workbook(path: Path, rows=5):
+    """Excel .xlsx minimo con le colonne obbligatorie."""
+    import openpyxl
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(fcm_core.SHEET_NAME)
+    ws.append(fcm_core.REQUIRED_COLUMNS)
+    for i in range(rows):
+        ws.append([f"Giocatore {i}" if c == "Nome" else i for c in fcm_core.REQUIRED_COLUMNS])
+    wb.save(path)
+    return path
+
+
+class InterruptedBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.output = self.tmp / "out"
+        self.output.mkdir()
+        self.files = [season_workbook(self.tmp / f"Stats_{y}_{y + 1}.xlsx") for y in (2021, 2022, 2023)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def convert(self, workers=1, **callbacks):
+        return fcm_core.process_files(self.files, self.output, workers=workers, precompress=True,
+                                      core="pandas", **callbacks)
+
+    def assert_no_staged_files(self):
+        self.assertEqual(sorted(p.name for p in self.output.glob("*.tmp")), [])
+        self.assertFalse((self.output / fcm_core.MANIFEST_FILE).exists())
+
+    def test_interrupt_during_file(self):
+        # Il secondo file si interrompe dopo aver preparato JSON e copie; il primo è già preparato
+        real = fcm_core.file_sha256
+        calls = []
+
+        def interrupted(fp):
+            calls.append(fp)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return real(fp)
+
+        with mock.patch.object(fcm_core, "file_sha256", interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.convert()
+        self.assertEqual(len(calls), 2)
+        self.assert_no_staged_files()
+
+    def test_interrupt_during_publish(self):
+        real = fcm_core.publish_staged
+        calls = []
+
+        def interrupted(output_dir, ops):
+            calls.append(ops)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            real(output_dir, ops)
+
+        with mock.patch.object(fcm_core, "publish_staged", interrupted):
+            with self.assertRaises(KeyboardInterrupt):
+                self.convert()
+        self.assert_no_staged_files()
+        # Il primo file era già pubblicato
+        self.assertTrue((self.output / "2021_2022.json").exists())
+
+    def test_interrupt_with_pool(self):
+        # Interruzione dopo il primo file: i risultati dei worker non ancora raccolti
+        # hanno file preparati che vanno rimossi
+        def on_progress(done, total):
+            if done == 1:
+                raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.convert(workers=3, on_progress=on_progress)
+        self.assert_no_staged_files()
+
+
+if __name__ == "__main__":
+    unittest.main()